@@ -0,0 +1,75 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Spelled-out forms of common street abbreviations, applied token by token
+TOKEN_ALIASES = {
+    "n": "north", "s": "south", "e": "east", "w": "west",
+    "st": "street", "str": "street", "ave": "avenue", "av": "avenue", "blvd": "boulevard",
+    "rd": "road", "dr": "drive", "ln": "lane", "ct": "court", "pkwy": "parkway", "hwy": "highway",
+}
+DIRECTIONS = frozenset(("north", "south", "east", "west"))
+STREET_TYPES = frozenset(("street", "avenue", "boulevard", "road", "drive", "lane", "court", "parkway", "highway"))
+UNIT_PATTERN = re.compile(r"(?:#|\b(?:suite|ste|apt|unit)\b\.?)\s*[\w-]+", re.IGNORECASE)
+NON_WORD = re.compile(r"[\W_]+")
+FUZZY_THRESHOLD = 0.6  # Minimum trigram (Dice) similarity for a fuzzy match
+
+# Reduce an address or place name to a canonical token string: street part only, no unit/suite,
+# lower case, punctuation removed and abbreviations spelled out ("410 S. State St." -> "410 south state street")
+def canonical_address(text):
+    street = UNIT_PATTERN.sub(" ", text.split(",")[0])
+    tokens = NON_WORD.sub(" ", street).lower().split()
+    return " ".join(TOKEN_ALIASES.get(token, token) for token in tokens)
+
+# The tokens that tell otherwise similar addresses apart: house and grid numbers, compass directions and
+# street types, in order ("4580 south 2300 east" and "4580 south 2300 west" differ only here)
+def signature(key):
+    return tuple(token for token in key.split() if token.isdigit() or token in DIRECTIONS or token in STREET_TYPES)
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Address resolution over the names and addresses of the distance-matrix locations. Exact canonical matches
+# are a dict lookup; anything else falls back to a trigram index that requires the numbers, directions and
+# street types to agree.
+# Results (including misses) are kept in an LRU cache.
+class AddressIndex:
+    def __init__(self, cache_size=65536):
+        self.exact = {}  # canonical text -> location index
+        self.postings = {}  # trigram -> canonical texts containing it
+        self.signatures = {}  # canonical text -> its numbers, directions and street types
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    # Register a name or street address for a location
+    def add(self, index, text):
+        key = canonical_address(text)
+        if not key or key in self.exact:
+            return
+        self.exact[key] = index
+        self.signatures[key] = signature(key)
+        for gram in trigrams(key):
+            self.postings.setdefault(gram, []).append(key)
+        self.resolve.cache_clear()
+
+    def _resolve(self, text):
+        key = canonical_address(text)
+        index = self.exact.get(key)
+        if index is not None or not key:
+            return index
+
+        # Count shared trigrams with every indexed text that has any in common
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+
+        key_signature = signature(key)
+        best, best_score = None, FUZZY_THRESHOLD
+        for candidate, count in shared.items():
+            if self.signatures[candidate] != key_signature:
+                continue  # Different numbers, directions or street types are different places, however similar the text
+            score = 2 * count / (len(grams) + len(trigrams(candidate)))
+            if score > best_score:
+                best, best_score = candidate, score
+        return self.exact[best] if best is not None else None
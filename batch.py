@@ -0,0 +1,214 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import delivery_logic
+import instrumentation
+from clock import format_clock, parse_clock
+from hash_table import HashTable
+from routing_engine import load_constraints, plan_routes
+from simulator import simulate_day
+from status_index import StatusIndex
+from truck import HUB_ADDRESS, load_fleet
+from truck_loading import assign_packages
+
+# Columns of the CSV outputs; JSON Lines records carry the same fields plus a "type"
+TRUCK_FIELDS = ("job", "truck", "departure", "return", "packages", "mileage", "route")
+PACKAGE_FIELDS = ("job", "package_id", "truck", "address", "deadline", "departure", "delivery", "on_time", "flag")
+SUMMARY_FIELDS = ("job", "loaded", "rejected", "delivered", "on_time", "late", "undelivered", "mileage")
+
+_distances = None  # Shared data, loaded once per process by load_shared_data
+
+# Load the address table and distance matrix once per process (pool initializer in worker processes).
+# The distance matrix comes from its binary cache, so workers map the same pages instead of parsing the CSV.
+# With closure, that is the cached shortest-path closure of the matrix.
+def load_shared_data(address_file, distance_file, closure=False):
+    global _distances
+    instrumentation.warning_stream = sys.stderr  # Keep stdout clean for the records
+    delivery_logic.load_address_data(address_file)
+    _distances = delivery_logic.load_distance_data(distance_file, closure=closure)
+
+# Finished delivery day: the simulated package table and trucks plus what planning decided
+class DayResult:
+    __slots__ = ("report", "packages", "trucks", "constraints", "routes", "flags")
+
+    def __init__(self, report, packages, trucks, constraints, routes, flags):
+        self.report = report  # IngestReport of the manifest
+        self.packages = packages
+        self.trucks = trucks
+        self.constraints = constraints
+        self.routes = routes  # {truck ID: [package IDs]}
+        self.flags = flags  # {package ID: reason} for packages that could not be loaded or routed as constrained
+
+# Load trucks automatically, plan and simulate one day over the shared address table and distance matrix.
+# Trucks run from hub unless the fleet file gives them their own. With a RunStore, the planned state is
+# snapshotted and every change during the simulation is logged to it.
+def run_day(package_file, fleet_file, drivers=None, address_changes=(), improve=False, distances=None, store=None,
+            hub=HUB_ADDRESS):
+    distances = _distances if distances is None else distances
+    packages = HashTable()
+    report = packages.load_package_data(package_file)
+    trucks = load_fleet(fleet_file, hub)
+    constraints = load_constraints(packages, address_changes)
+
+    flags = dict(assign_packages(trucks, packages, distances, constraints))
+    plan = plan_routes(trucks, packages, distances, constraints)
+    routes = plan.routes
+    if improve:
+        routes = {truck.id: delivery_logic.improve_truck_route(truck, routes[truck.id], packages, distances) for truck in trucks}
+    for package_id, reason in plan.infeasible.items():
+        flags.setdefault(package_id, reason)
+    if store is not None:
+        store.record_plan(flags, address_changes)
+    # Address corrections can re-order a route mid-day; report the order actually driven
+    routes = simulate_day(trucks, routes, packages, distances, drivers=drivers, address_changes=address_changes,
+                          store=store).routes
+    return DayResult(report, packages, trucks, constraints, routes, flags)
+
+# Plan and simulate one day. job is (name, package file, fleet file, drivers, address changes, query times,
+# improve); returns the day's records as plain dicts so they pickle cheaply back to the parent.
+def run_job(job):
+    name, package_file, fleet_file, drivers, address_changes, query_times, improve = job
+    day = run_day(package_file, fleet_file, drivers, address_changes, improve)
+    report, packages, trucks, constraints, routes, flags = (
+        day.report, day.packages, day.trucks, day.constraints, day.routes, day.flags)
+
+    records = []
+    for truck in trucks:
+        records.append({
+            "type": "truck", "job": name, "truck": truck.id,
+            "departure": format_clock(truck.depart_time), "return": format_clock(truck.time) if routes.get(truck.id) else None,
+            "packages": len(routes.get(truck.id, ())), "mileage": round(truck.mileage, 2), "route": list(routes.get(truck.id, ())),
+        })
+
+    index = StatusIndex(packages) if query_times else None
+    delivered = on_time = 0
+    for package in packages:
+        deadline = constraints[package.package_id].deadline
+        delivery = package.delivery_time
+        met = None if delivery is None else deadline is None or delivery <= deadline
+        delivered += delivery is not None
+        on_time += bool(met)
+        record = {
+            "type": "package", "job": name, "package_id": package.package_id, "truck": package.truck,
+            "address": package.address, "deadline": package.deadline,
+            "departure": format_clock(package.departure_time), "delivery": format_clock(delivery),
+            "on_time": met, "flag": flags.get(package.package_id),
+        }
+        if index is not None:
+            record["status"] = {format_clock(at): index.state(package.package_id, at) for at in query_times}
+        records.append(record)
+
+    records.append({
+        "type": "summary", "job": name, "loaded": report.loaded, "rejected": len(report.rejected),
+        "delivered": delivered, "on_time": on_time, "late": delivered - on_time, "undelivered": report.loaded - delivered,
+        "mileage": round(sum(truck.mileage for truck in trucks), 2),
+    })
+    return records
+
+# Writes records as one JSON Lines stream, or as trucks.csv / packages.csv / summary.csv in a directory
+class RecordWriter:
+    def __init__(self, output, output_format, query_times):
+        self.format = output_format
+        self.files = []
+        if output_format == "jsonl":
+            self.stream = open(output, 'w', encoding='utf-8') if output else sys.stdout
+            if output:
+                self.files.append(self.stream)
+            return
+
+        os.makedirs(output, exist_ok=True)
+        status_columns = tuple(f"status@{format_clock(at)}" for at in query_times)
+        self.writers = {}
+        for kind, fields in (("truck", TRUCK_FIELDS), ("package", PACKAGE_FIELDS + status_columns), ("summary", SUMMARY_FIELDS)):
+            file = open(os.path.join(output, f"{kind}s.csv" if kind != "summary" else "summary.csv"), 'w', newline='', encoding='utf-8')
+            self.files.append(file)
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            self.writers[kind] = (writer, fields)
+
+    def write(self, record):
+        if self.format == "jsonl":
+            self.stream.write(json.dumps(record) + "\n")
+            return
+        writer, fields = self.writers[record["type"]]
+        row = dict(record)
+        if "route" in row:
+            row["route"] = " ".join(row["route"])
+        for at, state in row.pop("status", {}).items():
+            row[f"status@{at}"] = state
+        writer.writerow(["" if row.get(field) is None else row[field] for field in fields])
+
+    def close(self):
+        for file in self.files:
+            file.close()
+
+# Jobs from the command line: one per --packages file, or one per row of a --jobs CSV (Name, Packages, Fleet)
+def build_jobs(args, address_changes, query_times):
+    jobs = []
+    if args.jobs:
+        with open(args.jobs, 'r', newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Skip header row
+            for row in reader:
+                if row:
+                    fleet = row[2].strip() if len(row) > 2 and row[2].strip() else args.fleet
+                    jobs.append((row[0].strip(), row[1].strip(), fleet, args.drivers, address_changes, query_times, args.improve))
+    for package_file in args.packages or ():
+        name = os.path.splitext(os.path.basename(package_file))[0]
+        jobs.append((name, package_file, args.fleet, args.drivers, address_changes, query_times, args.improve))
+
+    # Job names label every output record, so repeated names get a position suffix
+    names = [job[0] for job in jobs]
+    return [((f"{job[0]}-{position}" if names.count(job[0]) > 1 else job[0]),) + job[1:]
+            for position, job in enumerate(jobs, start=1)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan and simulate WGUPS delivery days without the interactive menu")
+    parser.add_argument("--addresses", default="CSV/address.csv")
+    parser.add_argument("--distances", default="CSV/distance.csv")
+    parser.add_argument("--packages", nargs="+", help="package manifests, one independent day each")
+    parser.add_argument("--jobs", help="CSV of days to run: Name, Packages, Fleet (fleet defaults to --fleet)")
+    parser.add_argument("--fleet", default="CSV/fleet.csv", help="CSV of trucks: Truck ID, Capacity, Speed, Departure")
+    parser.add_argument("--drivers", type=int, help="drivers available (default: one per truck)")
+    parser.add_argument("--at", nargs="*", default=[], metavar="HH:MM:SS", help="times to report every package's status at")
+    parser.add_argument("--change", nargs=3, action="append", default=[], metavar=("HH:MM:SS", "PACKAGE", "ADDRESS"),
+                        help="address correction that becomes known at a time of day (repeatable)")
+    parser.add_argument("--improve", action="store_true", help="run the 2-opt / Or-opt pass on each route")
+    parser.add_argument("--closure", action="store_true",
+                        help="fill distances the CSV leaves out with shortest paths (computed once, then cached)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--output", help="JSON Lines file (default stdout), or directory for the CSV files")
+    parser.add_argument("--workers", type=int, default=1, help="process pool size for multiple days")
+    args = parser.parse_args(argv)
+
+    if args.format == "csv" and not args.output:
+        parser.error("--format csv needs an --output directory")
+    query_times = [parse_clock(text) for text in args.at]
+    address_changes = [(parse_clock(when), package_id, address) for when, package_id, address in args.change]
+    jobs = build_jobs(args, address_changes, query_times)
+    if not jobs:
+        parser.error("give --packages or --jobs")
+
+    writer = RecordWriter(args.output, args.format, query_times)
+    try:
+        if args.workers > 1 and len(jobs) > 1:
+            # Build the distance cache up front so workers only ever map it
+            delivery_logic.load_distance_data(args.distances, closure=args.closure)
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=load_shared_data,
+                                     initargs=(args.addresses, args.distances, args.closure)) as executor:
+                for records in executor.map(run_job, jobs):
+                    for record in records:
+                        writer.write(record)
+        else:
+            load_shared_data(args.addresses, args.distances, args.closure)
+            for job in jobs:
+                for record in run_job(job):
+                    writer.write(record)
+    finally:
+        writer.close()
+
+if __name__ == "__main__":
+    main()
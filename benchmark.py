@@ -0,0 +1,783 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import delivery_logic
+import instrumentation
+from clock import clock_seconds, format_clock
+from distance_matrix import CACHE_SUFFIX, DistanceMatrix, map_cache, write_cache
+from event_log import RunStore, restore
+from hash_table import HashTable
+from package_columns import PackageColumns
+from planner import plan_routes_parallel
+from routing_engine import load_constraints, plan_routes
+from scenarios import aggregate, load_scenarios, run_scenarios
+from simulator import simulate_day
+from status_index import StatusIndex
+from synthetic_city import generate_city, generate_history
+from tracking_service import load_service
+from truck import HUB_ADDRESS, Truck, load_fleet
+from truck_loading import assign_packages
+
+SUITE_STAGES = ("load_addresses", "load_distances", "load_distances_cached", "load_packages", "hash_insert",
+                "hash_lookup", "assign", "routing", "simulation", "status_index", "status_queries",
+                "columns", "reports")
+
+# Fixed-bucket chaining table with tuple records, kept only as the baseline for comparison
+class ChainedHashTable:
+    def __init__(self, size=40):
+        self.size = size
+        self.table = [[] for _ in range(self.size)]
+
+    def hash(self, key):
+        return hash(key) % self.size
+
+    def insert(self, package_id, package_data):
+        index = self.hash(package_id)
+        package_info = (str(package_id), package_data[0], package_data[1], package_data[2], package_data[3], "At hub", None, None)
+        for i, item in enumerate(self.table[index]):
+            if item[0] == str(package_id):
+                self.table[index][i] = package_info
+                return
+        self.table[index].append(package_info)
+
+    def lookup(self, package_id):
+        index = self.hash(package_id)
+        for package in self.table[index]:
+            if str(package[0]) == str(package_id):
+                return package
+        return None
+
+    def update_package_details(self, package_id, status=None):
+        index = self.hash(package_id)
+        for i, package in enumerate(self.table[index]):
+            if str(package[0]) == str(package_id):
+                package_list = list(package)
+                if status:
+                    package_list[5] = status
+                self.table[index][i] = tuple(package_list)
+                return True
+        return False
+
+# Package table as it was before times became int seconds: records keep the timedelta times trucks hand it,
+# check times are datetimes, and every status check rebuilds datetimes with datetime.combine. Kept only as the
+# baseline for the simulation benchmark.
+class TimedeltaHashTable(HashTable):
+    def _parse_time(self, time_value):
+        if isinstance(time_value, str):
+            return datetime.strptime(time_value, '%H:%M:%S')
+        return time_value
+
+    def check_package_status(self, package_id, check_time=None):
+        package = self.lookup(package_id)
+        if not package:
+            return f"Package {package_id} not found"
+        departure_time = package.departure_time
+        delivery_time = package.delivery_time
+        if check_time is None:
+            check_time = datetime.now()
+        if isinstance(departure_time, timedelta):
+            departure_time = datetime.combine(check_time.date(), datetime.min.time()) + departure_time
+        if isinstance(delivery_time, timedelta):
+            delivery_time = datetime.combine(check_time.date(), datetime.min.time()) + delivery_time
+
+        if departure_time is None:
+            return f"Package {package_id} is at the hub as of {check_time.strftime('%I:%M %p')}"
+        if delivery_time is None:
+            if check_time >= departure_time:
+                return f"Package {package_id} is en route as of {check_time.strftime('%I:%M %p')}"
+            return f"Package {package_id} is at the hub as of {check_time.strftime('%I:%M %p')}"
+        if check_time >= delivery_time:
+            return f"Package {package_id} was delivered at {delivery_time.strftime('%I:%M %p')}"
+        if departure_time <= check_time < delivery_time:
+            return f"Package {package_id} is en route as of {check_time.strftime('%I:%M %p')}"
+        return f"Package {package_id} is at the hub as of {check_time.strftime('%I:%M %p')}"
+
+# Truck as it was before times became int seconds: a timedelta clock advanced by a fractional-hour timedelta
+# per leg. Kept only as the baseline for the simulation benchmark.
+class TimedeltaTruck(Truck):
+    def deliver_stop(self, package_ids, distance, destination):
+        self.mileage += distance
+        self.time += timedelta(hours=distance / self.speed)
+        self.current_location = destination
+        return self.time
+
+    def return_to_hub(self, distance):
+        self.mileage += distance
+        self.time += timedelta(hours=distance / self.speed)
+        self.current_location = self.hub
+        return self.time
+
+# Time a callable and return operations per second
+def ops_per_second(func, keys):
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    elapsed = time.perf_counter() - start
+    return len(keys) / elapsed if elapsed else float('inf')
+
+# Measure insert, lookup and update throughput of a table implementation
+def bench_hash_table(table_class, count, sample=100000):
+    table = table_class()
+    package_data = ["4001 South 700 East, Salt Lake City, UT 84107", "EOD", "2", ""]
+    keys = [str(i) for i in range(1, count + 1)]
+
+    insert_rate = ops_per_second(lambda key: table.insert(key, package_data), keys)
+
+    # Query a fixed-size sample spread across the table so large sizes stay quick to measure
+    step = max(1, count // sample)
+    sample_keys = keys[::step]
+    lookup_rate = ops_per_second(table.lookup, sample_keys)
+    update_rate = ops_per_second(lambda key: table.update_package_details(key, status="Delivered"), sample_keys)
+    return insert_rate, lookup_rate, update_rate
+
+# Package-by-package scan used before the matrix was stored contiguously, kept as the routing baseline
+def scalar_nearest_neighbor(truck, packages, distances, hub_index=0):
+    undelivered = truck.packages.copy()
+    route = []
+    current_location = hub_index
+    while undelivered:
+        nearest = None
+        min_distance = float('inf')
+        for package_id in undelivered:
+            address_index = packages.lookup(package_id).location
+            distance = distances[current_location][address_index]
+            if distance < min_distance:
+                min_distance = distance
+                nearest = package_id
+        if nearest is None:
+            break
+        route.append(nearest)
+        current_location = packages.lookup(nearest).location
+        undelivered.remove(nearest)
+    return route
+
+# Random points in a square with straight-line distances, as both a list of lists and a DistanceMatrix
+def random_city(addresses, seed=1):
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 20), rng.uniform(0, 20)) for _ in range(addresses)]
+    rows = [[round(math.dist(a, b), 1) for b in points] for a in points]
+    matrix = DistanceMatrix(addresses, array('d', [d for row in rows for d in row]))
+    return rows, matrix
+
+# Time routing one truck that has a package at every non-hub address: the scalar scan, the matrix route
+# on a fresh matrix (which builds its nearest-neighbor lists), and the matrix route on the same matrix mapped
+# from its binary cache, where the lists are stored
+def bench_routing(addresses):
+    rows, matrix = random_city(addresses)
+    packages = HashTable()
+    for location in range(1, addresses):
+        packages.insert(str(location), ["", "EOD", "1", ""]).location = location
+    truck = SimpleNamespace(packages=[str(location) for location in range(1, addresses)], hub=HUB_ADDRESS)
+
+    start = time.perf_counter()
+    scalar_route = scalar_nearest_neighbor(truck, packages, rows)
+    scalar_time = time.perf_counter() - start
+
+    # nearest_neighbor resolves the hub by name, so point the hub address at index 0
+    delivery_logic.address_to_index[delivery_logic.normalize_address(HUB_ADDRESS)] = 0
+    start = time.perf_counter()
+    route = delivery_logic.nearest_neighbor(truck, packages, matrix)
+    cold_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "distance.csv" + CACHE_SUFFIX)
+        write_cache(matrix, cache_path, b"\0" * 32)
+        cached = map_cache(cache_path, b"\0" * 32)
+        start = time.perf_counter()
+        cached_route = delivery_logic.nearest_neighbor(truck, packages, cached)
+        cached_time = time.perf_counter() - start
+        del cached  # Release the mapping before the directory goes
+    return scalar_time, cold_time, cached_time, route == scalar_route == cached_route
+
+# Write a full distance matrix in the same CSV layout as CSV/distance.csv (lower triangle only)
+def write_distance_csv(rows, filename):
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        for i, row in enumerate(rows):
+            writer.writerow(row[:i + 1] + [""] * (len(row) - i - 1))
+
+# Time planning (with the improvement pass) for many loaded trucks at each worker count
+def bench_planner(addresses, truck_count, per_truck, worker_counts, time_budget):
+    rows, _ = random_city(addresses)
+    rng = random.Random(7)
+    packages = HashTable()
+    trucks = []
+    for truck_id in range(1, truck_count + 1):
+        load = []
+        for n in range(per_truck):
+            package_id = f"{truck_id}-{n}"
+            packages.insert(package_id, ["", "EOD", "1", ""]).location = rng.randrange(1, addresses)
+            load.append(package_id)
+        trucks.append(Truck(truck_id, per_truck, 18, 0, HUB_ADDRESS, load, clock_seconds(8)))
+    delivery_logic.address_to_index[delivery_logic.normalize_address(HUB_ADDRESS)] = 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        distance_file = os.path.join(directory, "distance.csv")
+        write_distance_csv(rows, distance_file)
+        for workers in worker_counts:
+            start = time.perf_counter()
+            plan_routes_parallel(trucks, packages, distance_file, workers=workers, improve=True, time_budget=time_budget)
+            results.append((workers, time.perf_counter() - start))
+    return results
+
+# Run every stage of a delivery day once over a generated city; returns {stage: seconds} and a summary
+def run_suite_once(directory, status_queries):
+    timings = {}
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    distance_file = os.path.join(directory, "distance.csv")
+    if os.path.exists(distance_file + CACHE_SUFFIX):
+        os.remove(distance_file + CACHE_SUFFIX)  # Time the cold parse, then the cached load
+    timed("load_addresses", delivery_logic.load_address_data, os.path.join(directory, "address.csv"))
+    timed("load_distances", delivery_logic.load_distance_data, distance_file)
+    distances = timed("load_distances_cached", delivery_logic.load_distance_data, distance_file)
+    packages = HashTable()
+    report = timed("load_packages", packages.load_package_data, os.path.join(directory, "package.csv"))
+
+    # Raw table operations on the loaded package IDs
+    ids = [package.package_id for package in packages]
+    scratch = HashTable()
+    timed("hash_insert", lambda: [scratch.insert(package_id, ["", "EOD", "1", ""]) for package_id in ids])
+    timed("hash_lookup", lambda: [packages.lookup(package_id) for package_id in ids])
+
+    trucks = load_fleet(os.path.join(directory, "fleet.csv"))
+    constraints = load_constraints(packages)
+    unloaded = timed("assign", assign_packages, trucks, packages, distances, constraints)
+    plan = timed("routing", plan_routes, trucks, packages, distances, constraints)
+    timed("simulation", simulate_day, trucks, plan.routes, packages, distances)
+
+    index = timed("status_index", StatusIndex, packages)
+    query_times = [clock_seconds(8) + clock_seconds(12) * i // status_queries for i in range(status_queries)]
+    timed("status_queries", lambda: [(index.snapshot(at).counts, index.state(ids[i % len(ids)], at))
+                                     for i, at in enumerate(query_times)])
+
+    # End-of-day reporting: the fleet summary plus the full per-package CSV, streamed to nowhere
+    def end_of_day_report(columns):
+        with open(os.devnull, 'w', newline='') as sink:
+            columns.write_package_csv(sink)
+        return columns.fleet_report(trucks, query_times[:10])
+
+    columns = timed("columns", PackageColumns, packages)
+    fleet = timed("reports", end_of_day_report, columns)
+    summary = {
+        "loaded": report.loaded,
+        "rejected": len(report.rejected),
+        "unloaded": len(unloaded),
+        "infeasible": len(plan.infeasible),
+        "delivered": fleet["delivered"],
+        "late": fleet["delivered"] - fleet["on_time"],
+        "mileage": round(sum(truck.mileage for truck in trucks), 1),
+    }
+    return timings, summary
+
+# Current commit, so results files from different revisions can be told apart
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty else "")
+
+# Most recent result in a JSON Lines results file with the same city parameters, or None
+def find_baseline(filename, params):
+    baseline = None
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("params") == params:
+                    baseline = record
+    return baseline
+
+def run_suite(args):
+    params = {"addresses": args.addresses, "packages": args.packages, "trucks": args.trucks, "seed": args.seed,
+              "status_queries": args.status_queries}
+    baseline = find_baseline(args.baseline, params) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.city or scratch
+        start = time.perf_counter()
+        generate_city(directory, args.addresses, args.packages, args.trucks, args.seed)
+        generate_time = time.perf_counter() - start
+
+        if args.instrument:
+            instrumentation.enable()
+        instrumentation.quiet = True  # Generated cities have unreachable deadlines; count rather than print them
+
+        # Keep the fastest of the repeats per stage; every repeat starts from freshly loaded files
+        best = {}
+        for _ in range(args.repeat):
+            timings, summary = run_suite_once(directory, args.status_queries)
+            for stage, seconds in timings.items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+
+    record = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "repeat": args.repeat,
+        "generate": round(generate_time, 6),
+        "stages": {stage: round(best[stage], 6) for stage in SUITE_STAGES},
+        "summary": summary,
+    }
+    if args.instrument:
+        record["metrics"] = instrumentation.metrics()
+
+    print(f"{args.addresses} addresses, {args.packages} packages, {args.trucks} trucks (best of {args.repeat})")
+    print("{:<24} {:>12} {:>12}".format("Stage", "Seconds", "vs baseline"))
+    print("-" * 50)
+    for stage in SUITE_STAGES:
+        seconds = record["stages"][stage]
+        previous = baseline["stages"].get(stage) if baseline else None
+        change = f"{seconds / previous:.2f}x" if previous else ""
+        print("{:<24} {:>12.4f} {:>12}".format(stage, seconds, change))
+    print(f"Summary: {json.dumps(summary)}")
+    if args.instrument:
+        instrumentation.print_metrics()
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + "\n")
+
+# Wall time of fresh interpreter runs of a command from the program directory: (fastest seconds, last stdout).
+# The fastest run is the one least disturbed by the rest of the machine.
+def time_command(command, repeat, stdin=None):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, input=stdin, capture_output=True, text=True, cwd=directory, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times), result.stdout
+
+# Time to first answer for one package status question: a bare interpreter for reference, lookup.py from its
+# precomputed results, lookup.py rebuilding them, and the interactive main.py. With --baseline or --limit the
+# run is a regression check and exits nonzero when the lookup path got slower than allowed.
+def run_startup(args):
+    package_id, at = args.package, args.at
+    params = {"benchmark": "startup", "package": package_id, "at": at}
+    baseline = find_baseline(args.baseline, params) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as directory:
+        results_file = os.path.join(directory, "results.cache")
+        lookup = [sys.executable, "lookup.py", package_id, "--at", at, "--results", results_file]
+        stages = {}
+        stages["interpreter"], _ = time_command([sys.executable, "-c", "pass"], args.repeat)
+        stages["lookup_rebuild"], _ = time_command(lookup + ["--rebuild"], 1)
+        stages["lookup"], answer = time_command(lookup, args.repeat)
+        stages["main"], transcript = time_command([sys.executable, "main.py"], 1, f"1\n{package_id}\n{at}\n6\n")
+    same = answer.strip() in transcript
+
+    record = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "repeat": args.repeat,
+        "stages": {stage: round(seconds, 6) for stage, seconds in stages.items()},
+    }
+    print(f"Time to first answer for package {package_id} at {at} (best of {args.repeat} runs)")
+    print("{:<24} {:>12} {:>12}".format("Path", "Seconds", "vs baseline"))
+    print("-" * 50)
+    for stage, seconds in record["stages"].items():
+        previous = baseline["stages"].get(stage) if baseline else None
+        change = f"{seconds / previous:.2f}x" if previous else ""
+        print("{:<24} {:>12.4f} {:>12}".format(stage, seconds, change))
+    print(f"Answer: {answer.strip()} ({'matches' if same else 'DIFFERS FROM'} main.py)")
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + "\n")
+
+    failures = []
+    if not same:
+        failures.append("lookup.py and main.py disagree")
+    if args.limit is not None and stages["lookup"] > args.limit:
+        failures.append(f"lookup took {stages['lookup']:.4f} s, over the {args.limit} s limit")
+    if baseline and stages["lookup"] > baseline["stages"]["lookup"] * (1 + args.tolerance):
+        failures.append(f"lookup took {stages['lookup']:.4f} s, more than {args.tolerance:.0%} over the baseline "
+                        f"{baseline['stages']['lookup']:.4f} s")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+# One keep-alive client connection issuing GET requests back to back; returns per-request latencies
+async def service_client(port, targets):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    latencies = []
+    for target in targets:
+        start = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b""):
+                break
+            if header.lower().startswith(b"content-length:"):
+                length = int(header.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    return latencies
+
+# Serve the standard day and hit it with many concurrent connections from the same event loop
+async def bench_service(service, connections, requests_per_connection, seed=3):
+    server = await service.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    package_ids = list(service.index.times)
+    truck_ids = list(service.trucks)
+
+    def target():
+        at = f"{rng.randint(8, 17):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+        if rng.random() < 0.9:
+            return f"/packages/{rng.choice(package_ids)}?at={at}"
+        return f"/trucks/{rng.choice(truck_ids)}?at={at}"
+
+    plans = [[target() for _ in range(requests_per_connection)] for _ in range(connections)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(service_client(port, targets) for targets in plans))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    latencies = sorted(latency for result in results for latency in result)
+    return elapsed, latencies
+
+def run_service(args):
+    service = load_service(SimpleNamespace(addresses="CSV/address.csv", distances="CSV/distance.csv",
+                                           packages="CSV/package.csv", fleet="CSV/fleet.csv", drivers=2,
+                                           change=None, improve=False, state=None))
+    elapsed, latencies = asyncio.run(bench_service(service, args.connections, args.requests))
+    total = len(latencies)
+    print(f"{args.connections} concurrent connections x {args.requests} requests")
+    print(f"Requests/s: {total / elapsed:,.0f}")
+    print(f"Latency p50: {latencies[total // 2] * 1000:.2f} ms, p99: {latencies[int(total * 0.99)] * 1000:.2f} ms")
+    print(f"Package cache: {service.package_body.cache_info()}")
+
+# Persist a mid-day table of count packages (snapshot plus tail_events logged updates) and time a restart
+def bench_restore(count, tail_events, trucks=100):
+    packages = HashTable()
+    packages.bulk_insert([(str(i), f"{i} Main St, Salt Lake City, UT 84111", "EOD", "2", "", i % 500) for i in range(1, count + 1)])
+    fleet = [Truck(truck_id, count, 18, 0, HUB_ADDRESS, [], clock_seconds(8)) for truck_id in range(1, trucks + 1)]
+    for i, package in enumerate(packages):
+        if i % 2:
+            package.status, package.departure_time, package.delivery_time = "Delivered", clock_seconds(8), clock_seconds(9)
+        package.truck = i % trucks + 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = RunStore(directory, snapshot_interval=tail_events + 1)
+        start = time.perf_counter()
+        store.attach(packages, fleet, {truck.id: [] for truck in fleet})
+        snapshot_time = time.perf_counter() - start
+        for i in range(0, 2 * tail_events, 2):  # Undelivered packages going out after the snapshot
+            packages.update_package_details(str(i + 1), status="En route", departure_time=clock_seconds(10))
+        store.close()
+
+        start = time.perf_counter()
+        restored, *_ = restore(directory)
+        restore_time = time.perf_counter() - start
+        same = restored.lookup(str(2 * tail_events - 1)).status == "En route" and len(restored) == count
+    return snapshot_time, restore_time, same
+
+def run_restore(args):
+    print("{:<10} {:>12} {:>14} {:>14} {:>10}".format("Packages", "Log tail", "Snapshot (s)", "Restore (s)", "Correct"))
+    print("-" * 64)
+    for count in args.sizes:
+        snapshot_time, restore_time, same = bench_restore(count, args.tail)
+        print("{:<10} {:>12} {:>14.3f} {:>14.3f} {:>10}".format(count, args.tail, snapshot_time, restore_time, str(same)))
+
+# Times of day every package's status is checked at after a simulated day
+SIMULATION_CHECK_TIMES = (clock_seconds(9), clock_seconds(10, 30), clock_seconds(13))
+
+# The simulation benchmark's two time representations: (name, package table, truck class, departure time
+# conversion, check time conversion)
+SIMULATION_PATHS = (
+    ("timedelta", TimedeltaHashTable, TimedeltaTruck, lambda seconds: timedelta(seconds=seconds),
+     lambda seconds: datetime.strptime(format_clock(seconds), '%H:%M:%S')),
+    ("int seconds", HashTable, Truck, lambda seconds: seconds, lambda seconds: seconds),
+)
+
+# Simulate a full day from a fixed plan, then check every package's status at each check time
+def simulate_and_check(trucks, routes, packages, distances, check_times):
+    simulate_day(trucks, routes, packages, distances)
+    for package_id in [package.package_id for package in packages]:
+        for at in check_times:
+            packages.check_package_status(package_id, at)
+
+# Time and trace allocations of simulating a full day and checking statuses, once per time representation.
+# Planning happens once, outside the measured region; each run starts from a fresh package table and fleet.
+# Returns {path name: (seconds, traced peak bytes, retained bytes)}, best of repeat.
+def bench_simulation(directory, repeat):
+    delivery_logic.load_address_data(os.path.join(directory, "address.csv"))
+    distances = delivery_logic.load_distance_data(os.path.join(directory, "distance.csv"))
+    package_file = os.path.join(directory, "package.csv")
+    packages = HashTable()
+    packages.load_package_data(package_file)
+    fleet = load_fleet(os.path.join(directory, "fleet.csv"))
+    constraints = load_constraints(packages)
+    assign_packages(fleet, packages, distances, constraints)
+    plan = plan_routes(fleet, packages, distances, constraints)
+
+    def day(table_class, truck_class, clock):
+        table = table_class()
+        table.load_package_data(package_file)
+        trucks = [truck_class(truck.id, truck.capacity, truck.speed, 0, truck.hub, list(truck.packages),
+                              clock(truck.depart_time)) for truck in fleet]
+        return table, trucks
+
+    results = {}
+    for name, table_class, truck_class, clock, check_clock in SIMULATION_PATHS:
+        check_times = [check_clock(at) for at in SIMULATION_CHECK_TIMES]
+        runs = []
+        for _ in range(repeat):
+            table, trucks = day(table_class, truck_class, clock)
+            start = time.perf_counter()
+            simulate_and_check(trucks, plan.routes, table, distances, check_times)
+            elapsed = time.perf_counter() - start
+
+            # Second, traced run of the same day to count what it allocates and keeps
+            table, trucks = day(table_class, truck_class, clock)
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            simulate_and_check(trucks, plan.routes, table, distances, check_times)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+            runs.append((elapsed, peak, retained))
+        results[name] = min(runs)
+    return results
+
+def run_simulation(args):
+    with tempfile.TemporaryDirectory() as directory:
+        generate_city(directory, args.addresses, args.packages, args.trucks, args.seed)
+        results = bench_simulation(directory, args.repeat)
+    print(f"{args.packages} packages over {args.addresses} addresses, {args.trucks} trucks (best of {args.repeat}), "
+          f"statuses checked at {len(SIMULATION_CHECK_TIMES)} times")
+    print("{:<14} {:>12} {:>16} {:>16}".format("Times", "Seconds", "Peak (KiB)", "Retained (KiB)"))
+    print("-" * 62)
+    for name, (elapsed, peak, retained) in results.items():
+        print("{:<14} {:>12.4f} {:>16,.0f} {:>16,.0f}".format(name, elapsed, peak / 1024, retained / 1024))
+    (old_time, old_peak, _), (new_time, new_peak, _) = results["timedelta"], results["int seconds"]
+    print(f"int seconds vs timedelta: {new_time / old_time:.2f}x time, {new_peak / old_peak:.2f}x traced peak")
+
+def run_hash_table(args):
+    print("{:<10} {:<16} {:>14} {:>14} {:>14}".format("Packages", "Table", "Insert/s", "Lookup/s", "Update/s"))
+    print("-" * 72)
+    for count in args.sizes:
+        for name, table_class in (("chained", ChainedHashTable), ("open-address", HashTable)):
+            if table_class is ChainedHashTable and count > args.chained_max:
+                print("{:<10} {:<16} {:>14}".format(count, name, "skipped"))
+                continue
+            insert_rate, lookup_rate, update_rate = bench_hash_table(table_class, count)
+            print("{:<10} {:<16} {:>14,.0f} {:>14,.0f} {:>14,.0f}".format(count, name, insert_rate, lookup_rate, update_rate))
+
+def run_routing(args):
+    print("{:<10} {:>14} {:>14} {:>14} {:>12}".format("Addresses", "Scalar (s)", "Matrix (s)", "Cached (s)", "Same route"))
+    print("-" * 68)
+    for addresses in args.addresses:
+        scalar_time, cold_time, cached_time, same = bench_routing(addresses)
+        print("{:<10} {:>14.4f} {:>14.4f} {:>14.4f} {:>12}".format(addresses, scalar_time, cold_time, cached_time, str(same)))
+
+# Row-at-a-time Floyd-Warshall over a flat matrix, the textbook all-pairs closure, kept only as the baseline
+# the closure benchmark measures the per-source Dijkstra in distance_matrix against
+def floyd_warshall_closure(data, size):
+    rows = [list(data[i * size:(i + 1) * size]) for i in range(size)]
+    for i in range(size):
+        rows[i][i] = 0.0
+    for k in range(size):
+        row_k = rows[k]
+        for i in range(size):
+            through = rows[i][k]
+            if i != k and through != math.inf:
+                rows[i] = list(map(min, rows[i], [through + step for step in row_k]))
+    closed = array('d')
+    for row in rows:
+        closed.extend(row)
+    return closed
+
+# Time closing a partial matrix (a share of the pairs left out) with Dijkstra from every source, as the loader
+# does, and with the Floyd-Warshall baseline (up to floyd_max addresses), then loading the closure back from
+# its cache. Returns (gaps, gaps left, Dijkstra s, Floyd-Warshall s or None, cached s, same result).
+def bench_closure(addresses, missing, floyd_max, seed=7):
+    rows, _ = random_city(addresses)
+    rng = random.Random(seed)
+    for i, row in enumerate(rows):
+        for j in range(i):
+            if rng.random() < missing:
+                row[j] = rows[j][i] = ""
+    with tempfile.TemporaryDirectory() as directory:
+        distance_file = os.path.join(directory, "distance.csv")
+        write_distance_csv(rows, distance_file)
+        matrix = delivery_logic.load_distance_data(distance_file)
+        gaps = matrix._view.tolist().count(math.inf)
+        start = time.perf_counter()
+        closed = delivery_logic.load_distance_data(distance_file, closure=True)
+        closure_time = time.perf_counter() - start
+        start = time.perf_counter()
+        delivery_logic.load_distance_data(distance_file, closure=True)
+        cached_time = time.perf_counter() - start
+        remaining = closed._view.tolist().count(math.inf)
+
+        floyd_time, same = None, None
+        if addresses <= floyd_max:
+            start = time.perf_counter()
+            floyd = floyd_warshall_closure(matrix._view, addresses)
+            floyd_time = time.perf_counter() - start
+            same = all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(floyd, closed._view))
+    return gaps, remaining, closure_time, floyd_time, cached_time, same
+
+def run_closure(args):
+    print("{:<10} {:>8} {:>9} {:>6} {:>13} {:>13} {:>11} {:>6}".format(
+        "Addresses", "Missing", "Gaps", "Left", "Dijkstra (s)", "Floyd (s)", "Cached (s)", "Same"))
+    print("-" * 84)
+    for addresses in args.addresses:
+        gaps, remaining, closure_time, floyd_time, cached_time, same = bench_closure(addresses, args.missing, args.floyd_max)
+        floyd = "skipped" if floyd_time is None else f"{floyd_time:.3f}"
+        print("{:<10} {:>8.0%} {:>9} {:>6} {:>13.3f} {:>13} {:>11.4f} {:>6}".format(
+            addresses, args.missing, gaps, remaining, closure_time, floyd, cached_time, "" if same is None else str(same)))
+
+def run_planner(args):
+    print(f"{args.trucks} trucks x {args.per_truck} packages over {args.addresses} addresses ({os.cpu_count()} CPUs)")
+    print("{:<10} {:>14} {:>10}".format("Workers", "Seconds", "Speedup"))
+    print("-" * 36)
+    results = bench_planner(args.addresses, args.trucks, args.per_truck, args.workers, args.time_budget)
+    baseline = results[0][1]
+    for workers, seconds in results:
+        print("{:<10} {:>14.3f} {:>9.2f}x".format(workers, seconds, baseline / seconds))
+
+# Time a generated multi-depot history at each worker count; every count runs the same scenarios
+def bench_scenarios(addresses, depots, days, packages, trucks, worker_counts):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        generate_history(directory, addresses, depots, days, packages, trucks)
+        address_file, distance_file = os.path.join(directory, "address.csv"), os.path.join(directory, "distance.csv")
+        scenarios = load_scenarios(os.path.join(directory, "scenarios.csv"), HUB_ADDRESS, None, None, False)
+        for workers in worker_counts:
+            start = time.perf_counter()
+            summary = aggregate(run_scenarios(scenarios, address_file, distance_file, workers))[1]
+            results.append((workers, time.perf_counter() - start, summary))
+    return len(scenarios), results
+
+def run_scenario_benchmark(args):
+    print(f"{args.depots} depots x {args.days} days, {args.packages} packages and {args.trucks} trucks each, "
+          f"over {args.addresses} addresses ({os.cpu_count()} CPUs)")
+    print("{:<10} {:>10} {:>14} {:>10}".format("Workers", "Seconds", "Scenarios/s", "Speedup"))
+    print("-" * 47)
+    count, results = bench_scenarios(args.addresses, args.depots, args.days, args.packages, args.trucks, args.workers)
+    baseline = results[0][1]
+    for workers, seconds, _ in results:
+        print("{:<10} {:>10.3f} {:>14.2f} {:>9.2f}x".format(workers, seconds, count / seconds, baseline / seconds))
+    # Every worker count must reach the same totals
+    same = all(summary == results[0][2] for _, _, summary in results)
+    print(f"Totals: {json.dumps(results[0][2])} ({'identical' if same else 'DIFFERENT'} across worker counts)")
+
+def main():
+    parser = argparse.ArgumentParser(description="WGUPS performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    hash_parser = subparsers.add_parser("hash-table", help="HashTable insert/lookup/update throughput")
+    hash_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    hash_parser.add_argument("--chained-max", type=int, default=100000,
+                             help="largest size to run the chained baseline at (it degrades quadratically)")
+    hash_parser.set_defaults(run=run_hash_table)
+
+    routing_parser = subparsers.add_parser("routing", help="nearest-neighbor route construction time")
+    routing_parser.add_argument("--addresses", type=int, nargs="+", default=[500, 2000])
+    routing_parser.set_defaults(run=run_routing)
+
+    closure_parser = subparsers.add_parser("closure", help="shortest-path closure of a partial distance matrix")
+    closure_parser.add_argument("--addresses", type=int, nargs="+", default=[100, 300])
+    closure_parser.add_argument("--missing", type=float, default=0.5, help="share of pairs left out of the CSV")
+    closure_parser.add_argument("--floyd-max", type=int, default=300,
+                                help="largest matrix to also close with the Floyd-Warshall baseline")
+    closure_parser.set_defaults(run=run_closure)
+
+    planner_parser = subparsers.add_parser("planner", help="parallel multi-truck planning at several worker counts")
+    planner_parser.add_argument("--addresses", type=int, default=1000)
+    planner_parser.add_argument("--trucks", type=int, default=32)
+    planner_parser.add_argument("--per-truck", type=int, default=120)
+    planner_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    planner_parser.add_argument("--time-budget", type=float, default=2.0, help="improvement pass budget per truck (s)")
+    planner_parser.set_defaults(run=run_planner)
+
+    scenario_parser = subparsers.add_parser("scenarios", help="multi-depot scenario throughput at several worker counts")
+    scenario_parser.add_argument("--addresses", type=int, default=500)
+    scenario_parser.add_argument("--depots", type=int, default=4)
+    scenario_parser.add_argument("--days", type=int, default=7)
+    scenario_parser.add_argument("--packages", type=int, default=2000, help="packages per scenario")
+    scenario_parser.add_argument("--trucks", type=int, default=8, help="trucks per depot")
+    scenario_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    scenario_parser.set_defaults(run=run_scenario_benchmark)
+
+    service_parser = subparsers.add_parser("service", help="tracking service throughput under concurrent clients")
+    service_parser.add_argument("--connections", type=int, default=2000)
+    service_parser.add_argument("--requests", type=int, default=20, help="requests per connection")
+    service_parser.set_defaults(run=run_service)
+
+    simulation_parser = subparsers.add_parser("simulation", help="time and allocations of simulating a full day")
+    simulation_parser.add_argument("--addresses", type=int, default=500)
+    simulation_parser.add_argument("--packages", type=int, default=50000)
+    simulation_parser.add_argument("--trucks", type=int, default=50)
+    simulation_parser.add_argument("--seed", type=int, default=1)
+    simulation_parser.add_argument("--repeat", type=int, default=3)
+    simulation_parser.set_defaults(run=run_simulation)
+
+    restore_parser = subparsers.add_parser("restore", help="snapshot and restart time for a persisted mid-day state")
+    restore_parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    restore_parser.add_argument("--tail", type=int, default=10000, help="events logged after the snapshot")
+    restore_parser.set_defaults(run=run_restore)
+
+    suite_parser = subparsers.add_parser("suite", help="time every stage of a full day over a synthetic city")
+    suite_parser.add_argument("--addresses", type=int, default=500)
+    suite_parser.add_argument("--packages", type=int, default=5000)
+    suite_parser.add_argument("--trucks", type=int, default=20)
+    suite_parser.add_argument("--seed", type=int, default=1)
+    suite_parser.add_argument("--status-queries", type=int, default=10000)
+    suite_parser.add_argument("--repeat", type=int, default=3)
+    suite_parser.add_argument("--instrument", action="store_true",
+                              help="also collect counters and timers (adds overhead to the timed stages)")
+    suite_parser.add_argument("--city", help="directory to write the generated CSV files to (kept afterwards)")
+    suite_parser.add_argument("--output", default="benchmark_results.jsonl", help="JSON Lines file results are appended to")
+    suite_parser.add_argument("--baseline", help="results file to compare against (last run with the same parameters)")
+    suite_parser.set_defaults(run=run_suite)
+
+    startup_parser = subparsers.add_parser("startup", help="cold-start time to answer one package lookup")
+    startup_parser.add_argument("--package", default="9")
+    startup_parser.add_argument("--at", default="10:30:00", metavar="HH:MM:SS")
+    startup_parser.add_argument("--repeat", type=int, default=15)
+    startup_parser.add_argument("--output", help="JSON Lines file results are appended to")
+    startup_parser.add_argument("--baseline", help="results file to check against (last run with the same parameters)")
+    startup_parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown over the baseline")
+    startup_parser.add_argument("--limit", type=float, help="fail if the lookup path takes longer than this (seconds)")
+    startup_parser.set_defaults(run=run_startup)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
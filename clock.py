@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+# Every time of day inside the program is a plain int: seconds since midnight. Text, datetime and timedelta
+# values are converted once where they come in, and times are only formatted back to text for output.
+
+SECONDS_PER_HOUR = 3600
+END_OF_DAY = 24 * SECONDS_PER_HOUR - 1  # 23:59:59
+
+def clock_seconds(hours=0, minutes=0, seconds=0):
+    return hours * SECONDS_PER_HOUR + minutes * 60 + seconds
+
+# Seconds needed to drive a distance (miles) at a speed (mph), rounded to the nearest second
+def travel_seconds(distance, speed):
+    return round(distance * SECONDS_PER_HOUR / speed)
+
+# Convert a datetime/time (time of day only), timedelta, "HH:MM:SS" text or int seconds to int seconds; None stays None
+def to_seconds(value):
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return parse_clock(value)
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return value.hour * SECONDS_PER_HOUR + value.minute * 60 + value.second
+
+# Parse 24-hour "HH:MM:SS" (or "HH:MM") text
+def parse_clock(text):
+    parts = text.strip().split(":")
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        raise ValueError(f"invalid time '{text}', expected HH:MM:SS")
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = int(parts[2]) if len(parts) == 3 else 0
+    if hours > 23 or minutes > 59 or seconds > 59:
+        raise ValueError(f"invalid time '{text}', expected HH:MM:SS")
+    return clock_seconds(hours, minutes, seconds)
+
+# Parse 12-hour "10:30 AM" / "9:05am" text
+def parse_am_pm(text):
+    text = text.strip().upper().replace(" ", "")
+    if text[-2:] not in ("AM", "PM"):
+        raise ValueError(f"invalid time '{text}', expected H:MM AM/PM")
+    seconds = parse_clock(text[:-2])
+    hours = seconds // SECONDS_PER_HOUR
+    if not 1 <= hours <= 12:
+        raise ValueError(f"invalid time '{text}', expected H:MM AM/PM")
+    return (hours % 12 + (12 if text.endswith("PM") else 0)) * SECONDS_PER_HOUR + seconds % SECONDS_PER_HOUR
+
+# Convert "10:30 AM"-style text to seconds since midnight; EOD and blanks mean no deadline
+def parse_clock_time(text):
+    text = text.strip().upper()
+    if not text or text == "EOD":
+        return None
+    return parse_am_pm(text)
+
+# "8:11:20", the layout of the timedelta values printed before times were ints
+def format_time(seconds):
+    return f"{seconds // SECONDS_PER_HOUR}:{seconds % SECONDS_PER_HOUR // 60:02d}:{seconds % 60:02d}"
+
+# "08:11:20" for machine-readable output; None stays None
+def format_clock(seconds):
+    if seconds is None:
+        return None
+    return f"{seconds // SECONDS_PER_HOUR:02d}:{seconds % SECONDS_PER_HOUR // 60:02d}:{seconds % 60:02d}"
+
+# "08:11 AM" (or "08:11:20 AM"), matching strftime('%I:%M %p')
+def format_am_pm(seconds, with_seconds=False):
+    hours = seconds // SECONDS_PER_HOUR % 24
+    text = f"{(hours - 1) % 12 + 1:02d}:{seconds % SECONDS_PER_HOUR // 60:02d}"
+    if with_seconds:
+        text += f":{seconds % 60:02d}"
+    return f"{text} {'PM' if hours >= 12 else 'AM'}"
@@ -1,6 +1,14 @@
 import csv
 import math
 import re
+import instrumentation
+from address_index import AddressIndex
+from clock import parse_clock_time
+from distance_matrix import load_distance_matrix, nearest_candidate
+from route_improvement import improve_route, route_mileage
+
+# Runs of punctuation, underscores and whitespace, collapsed to one space by normalize_address
+NON_WORD = re.compile(r'[\W_]+')
 
 # Normalize address by removing city, state, and zip code, replacing abbreviations, and standardizing format
 def normalize_address(address):
@@ -11,45 +19,25 @@ def normalize_address(address):
     address = (address.strip().replace(' ST', ' STREET').replace(' AVE', ' AVENUE'))
     
     # Remove extra spaces, punctuation, and standardize case
-    return re.sub(r'[\W_]+', ' ', address).strip().lower()
+    return NON_WORD.sub(' ', address).strip().lower()
 
-# Load distance data from a CSV file and return a symmetric distance matrix
-def load_distance_data(filename='CSV/distance.csv'):
-    distances = []
-    
-    with open(filename, 'r', newline='', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        for row in reader:
-            distance_row = []
-            for d in row:
-                if d.strip():  
-                    try:
-                        distance_row.append(float(d))
-                    except ValueError:
-                        print(f"Warning: Invalid distance value '{d}', treating as None.")
-                        distance_row.append(None)
-                else:
-                    distance_row.append(None)
-            distances.append(distance_row)
-    
-    # Fill in the lower triangle of the matrix (since it's symmetric)
-    for i in range(len(distances)):
-        for j in range(i):
-            if distances[i][j] is None:
-                distances[i][j] = distances[j][i]
-    
-    # Consistency check: fill None values where possible
-    for i in range(len(distances)):
-        for j in range(len(distances)):
-            if distances[i][j] is None and distances[j][i] is not None:
-                distances[i][j] = distances[j][i]  # Fill in the distance
-    
-    return distances
+# Load distance data from a CSV file and return a symmetric distance matrix.
+# The parsed matrix is cached next to the CSV in binary form and memory-mapped on later runs.
+# With closure, missing pairs are filled with shortest paths through the table (see shortest_path_closure).
+def load_distance_data(filename='CSV/distance.csv', use_cache=True, closure=False):
+    return load_distance_matrix(filename, use_cache, closure)
+
+# Normalized address -> distance matrix index, filled by load_address_data
+address_to_index = {}
+
+# Fuzzy index over the same names and addresses, for variants the exact dictionary misses
+address_index = AddressIndex()
 
 # Load address data from a CSV file and map addresses to indices for lookup purposes
 def load_address_data(filename='CSV/address.csv'):
-    global address_to_index
+    global address_to_index, address_index
     address_to_index = {}
+    address_index = AddressIndex()
     
     with open(filename, 'r', encoding='utf-8-sig') as file:
         reader = csv.reader(file)
@@ -63,117 +51,98 @@ def load_address_data(filename='CSV/address.csv'):
             # Store both name and address in dictionary
             address_to_index[name] = index
             address_to_index[address] = index
+            address_index.add(index, row[1])
+            address_index.add(index, row[2])
+
+# Get the index of an address without warning when it is unknown
+def resolve_address(address):
+    index = address_to_index.get(normalize_address(address))
+    if index is not None:
+        if instrumentation.enabled:
+            instrumentation.count("address.exact_hits")
+        return index
+    # Variants such as "S" vs "South" or a missing suite number go through the fuzzy index
+    index = address_index.resolve(address)
+    if instrumentation.enabled:
+        instrumentation.count("address.fuzzy_hits" if index is not None else "address.misses")
+    return index
 
 # Get the index of a normalized address from the global dictionary          
 def get_address_index(address):
     normalized_address = normalize_address(address)
     
     if normalized_address in address_to_index:
+        if instrumentation.enabled:
+            instrumentation.count("address.exact_hits")
         return address_to_index[normalized_address]
+
+    index = address_index.resolve(address)
+    if index is not None:
+        if instrumentation.enabled:
+            instrumentation.count("address.fuzzy_hits")
+        return index
     
-    print(f"Warning: Address '{address}' normalized to '{normalized_address}' not found.")
+    if instrumentation.enabled:
+        instrumentation.count("address.misses")
+    instrumentation.warn(f"Address '{address}' normalized to '{normalized_address}' not found.")
     return None  
 
 # Find the nearest neighbor package to deliver next based on current truck location and distance matrix
 def nearest_neighbor(truck, packages, distances):
-    undelivered = truck.packages.copy()
     route = []
-    current_location = get_address_index("4001 South 700 East")  # Start at hub
-
-    while undelivered:  # Loop until all packages are delivered
-        nearest = None  # Variable to store nearest package ID
-        min_distance = float('inf')
-
-        for package_id in undelivered:
-            package = packages.lookup(str(package_id))
-            if package:
-                address_index = get_address_index(package[1])
-                if address_index is not None:
-                    distance = distances[current_location][address_index]
-                    # Checks if the distance from current location to delivery address is working
-                    #print(f"Debug: Distance from {current_location} to {address_index} ({package[1]}): {distance}")
-                    
-                    if distance is None or distance == math.inf:
-                        continue
-                    
-                    if distance < min_distance:
-                        min_distance = distance
-                        nearest = package_id
-        
-        if nearest is None:
-            print(f"Warning: No valid package found. Remaining packages: {undelivered}")
+    current_location = get_address_index(truck.hub)  # Start at the truck's hub
+
+    # Group the truck's packages by destination, keeping load order within each stop
+    stops = {}
+    unresolved = []
+    for package_id in truck.packages:
+        package = packages.lookup(str(package_id))
+        if package and package.location is not None:
+            stops.setdefault(package.location, []).append(package_id)
+        else:
+            unresolved.append(package_id)
+
+    stop_count = len(stops)
+    while stops:  # Loop until every reachable stop is visited
+        # Only locations with undelivered packages are candidates; the k nearest are checked first
+        nearest = nearest_candidate(distances, current_location, stops)
+        if distances[current_location][nearest] == math.inf:
             break
 
-        route.append(nearest)  # Add nearest package to delivery route
-        package = packages.lookup(str(nearest))
-        current_location = get_address_index(package[1])  # Update current location to new delivery destination
-        if current_location is None:
-            print(f"Error: Invalid current location for package {nearest}: {package[1]}")
-            break
-        undelivered.remove(nearest)
+        route.extend(stops.pop(nearest))  # Deliver every package at the nearest stop
+        current_location = nearest  # Update current location to new delivery destination
+
+    if instrumentation.enabled:
+        instrumentation.count("nearest_neighbor.calls")
+        instrumentation.count("nearest_neighbor.iterations", stop_count - len(stops))
+
+    remaining = [package_id for stop in stops.values() for package_id in stop] + unresolved
+    if remaining:
+        instrumentation.warn(f"No valid package found. Remaining packages: {remaining}")
 
     return route
 
-# Simulate delivering packages for each truck based on their routes and update their statuses/times accordingly.
-def deliver_packages(trucks, route, packages, distances):
-    # Sort trucks based on departure time
-    sorted_trucks = sorted(trucks, key=lambda truck: truck.depart_time)
-    
-    for i in range(0, len(sorted_trucks), 2):
-        selected_trucks = sorted_trucks[i:i+2]  # Process trucks in pairs (two at a time)
-
-        for truck in selected_trucks:
-            if len(truck.packages) == 0: # Skip trucks with no packages
-                continue
-
-            for package_id in route:
-                if package_id not in truck.packages:
-                    continue
-                
-                package = packages.lookup(str(package_id))
-                
-                if package:
-                    from_index = get_address_index(truck.current_location)
-                    to_index = get_address_index(package[1])  
-                    
-                    if from_index is not None and to_index is not None:
-                        # Update package to "En route" with departure time
-                        packages.update_package_details(
-                            str(package_id), 
-                            status="En route", 
-                            departure_time=truck.time  # Set departure time when the truck begins delivery
-                        )
-                        # Debug statement does same thing on update_package_details
-                        #print(f"Updating package {package_id} status to en route at {truck.time}")  
-
-                        # Calculate distance and simulate delivery
-                        distance = distances[from_index][to_index]
-                        delivery_time = truck.deliver(package_id, distance, package[1])
-
-                        # Update package to "Delivered" with delivery time
-                        if delivery_time:
-                            packages.update_package_details(
-                                str(package_id), 
-                                status="Delivered", 
-                                delivery_time=delivery_time
-                            )
-                            # Debug statement does same thing on update_package_details
-                            #print(f"Package {package_id} delivered at {delivery_time}")
-                    else:
-                        print(f"Warning: Unable to calculate distance for Package {package_id}")
-                else:
-                    print(f"Warning: Package {package_id} not found")
-            
-            # Return truck to hub after deliveries
-            hub_index = get_address_index("4001 South 700 East")
-            if hub_index is not None and get_address_index(truck.current_location) is not None:
-                return_distance = distances[get_address_index(truck.current_location)][hub_index]
-                truck.return_to_hub(return_distance)
-            else:
-                print("Warning: Unable to calculate return distance to hub")
+# Shorten a truck's route with 2-opt / Or-opt without making any package late that the route delivered on time,
+# and record its planned mileage before and after
+def improve_truck_route(truck, route, packages, distances, time_budget=1.0, max_iterations=10000):
+    hub_index = get_address_index(truck.hub)
+    records = {package_id: packages.lookup(str(package_id)) for package_id in route}
+    locations = {package_id: package.location for package_id, package in records.items()}
+    deadlines = {package_id: parse_clock_time(package.deadline or "") for package_id, package in records.items()}
+    truck.greedy_mileage = route_mileage(route, locations, distances, hub_index)
+    improved = improve_route(route, locations, distances, hub_index, time_budget, max_iterations, deadlines,
+                             truck.depart_time, truck.speed)
+    truck.improved_mileage = route_mileage(improved, locations, distances, hub_index)
+    return improved
 
 # Calculate and print total mileage traveled by all trucks after deliveries are completed.              
 def calculate_and_print_total_mileage(trucks):
+    # Show what the route improvement pass saved on each truck that went through it
+    for truck in trucks:
+        if truck.greedy_mileage is not None:
+            saved = truck.greedy_mileage - truck.improved_mileage
+            print(f"Truck {truck.id}: {truck.greedy_mileage:.2f} miles before improvement, "
+                  f"{truck.improved_mileage:.2f} after ({saved:.2f} saved)")
     total_mileage = sum(truck.mileage for truck in trucks)
     print(f"Total mileage for all trucks: {total_mileage:.2f} miles")
 
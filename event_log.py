@@ -0,0 +1,163 @@
+import gc
+import json
+import marshal
+import os
+from hash_table import HashTable
+from truck import Truck
+
+LOG_NAME = "events.log"
+SNAPSHOT_NAME = "snapshot.bin"
+SNAPSHOT_MAGIC = b"WGUSNAP4"  # Version 4: times are int seconds since midnight, trucks carry their hub, plus the plan's flags and address changes
+SNAPSHOT_INTERVAL = 100000  # Events between automatic snapshots
+
+# Event kinds written to the log, one JSON array per line
+PACKAGE_EVENT = "P"  # [P, package ID, status, delivery, departure(, address, location)]
+TRUCK_EVENT = "T"  # [T, truck ID, mileage, time, current location]
+ROUTE_EVENT = "R"  # [R, truck ID, [package IDs]]
+
+# Durable run state in a directory: an append-only log of every package, truck and route change plus a compact
+# snapshot taken every snapshot_interval events. A restart loads the snapshot and replays only the log written
+# after it. Attach the store to a package table and the simulator and update_package_details log through it.
+class RunStore:
+    def __init__(self, directory, snapshot_interval=SNAPSHOT_INTERVAL, durable=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.log_path = os.path.join(directory, LOG_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.snapshot_interval = snapshot_interval
+        self.durable = durable  # Flush every event instead of on snapshots and close
+        self.log = open(self.log_path, 'ab')
+        self.pending = 0  # Events since the last snapshot
+        self.packages = None
+        self.trucks = []
+        self.routes = {}
+        self.flags = {}
+        self.address_changes = []
+
+    # Start logging changes to a package table, its trucks and their routes, with a snapshot of where they are now.
+    # routes must be the dict that re-routes modify (the simulator's), or later snapshots write stale routes.
+    def attach(self, packages, trucks, routes):
+        self.packages = packages
+        self.trucks = list(trucks)
+        self.routes = routes
+        packages.event_log = self
+        self.snapshot()
+
+    # Keep what the day was planned with for snapshots: {package ID: reason} for packages that could not be
+    # delivered as constrained, and the (time, package ID, address) corrections the day was run with
+    def record_plan(self, flags, address_changes):
+        self.flags = dict(flags)
+        self.address_changes = [tuple(change) for change in address_changes]
+
+    def append(self, event):
+        self.log.write(json.dumps(event, separators=(",", ":")).encode() + b"\n")
+        if self.durable:
+            self.log.flush()
+        self.pending += 1
+        if self.pending >= self.snapshot_interval and self.packages is not None:
+            self.snapshot()
+
+    def package_changed(self, package, address_changed=False):
+        event = [PACKAGE_EVENT, package.package_id, package.status, package.delivery_time, package.departure_time]
+        if address_changed:
+            event += [package.address, package.location]
+        self.append(event)
+
+    def truck_moved(self, truck):
+        self.append([TRUCK_EVENT, truck.id, truck.mileage, truck.time, truck.current_location])
+
+    def route_changed(self, truck_id, route):
+        self.append([ROUTE_EVENT, truck_id, list(route)])
+
+    # Write the whole state to the snapshot file (atomically) and remember how far into the log it reaches
+    def snapshot(self):
+        self.log.flush()
+        os.fsync(self.log.fileno())
+        columns = {
+            "log_offset": self.log.tell(),
+            "packages": [
+                (p.package_id, p.address, p.deadline, p.weight, p.notes, p.location, p.status,
+                 p.delivery_time, p.departure_time, p.truck)
+                for p in self.packages
+            ],
+            "trucks": [
+                (t.id, t.capacity, t.speed, t.mileage, t.current_location, list(t.packages), t.depart_time, t.time, t.hub)
+                for t in self.trucks
+            ],
+            "routes": [(truck_id, list(route)) for truck_id, route in self.routes.items()],
+            "flags": list(self.flags.items()),
+            "address_changes": self.address_changes,
+        }
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(SNAPSHOT_MAGIC + bytes([marshal.version]))
+            file.write(marshal.dumps(columns))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.pending = 0
+
+    def close(self):
+        self.log.flush()
+        self.log.close()
+
+# Rebuild (packages, trucks, routes, flags, address changes) from a store directory: load the latest snapshot,
+# then apply the log from the snapshot's offset on. A torn last line (a crash mid-write) is ignored. Returns None
+# without a snapshot.
+def restore(directory):
+    # As with ingest, millions of new records would otherwise trigger repeated full collections
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _restore(directory)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def _restore(directory):
+    snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+    if not os.path.exists(snapshot_path):
+        return None
+    with open(snapshot_path, 'rb') as file:
+        header = file.read(len(SNAPSHOT_MAGIC) + 1)
+        if header[:-1] != SNAPSHOT_MAGIC or header[-1] != marshal.version:
+            raise ValueError(f"'{snapshot_path}' is not a snapshot this Python version can read")
+        columns = marshal.loads(file.read())
+
+    packages = HashTable()
+    rows = columns["packages"]
+    packages.bulk_insert([row[:6] for row in rows])
+    for package, row in zip(packages, rows):
+        package.status = row[6]
+        package.delivery_time = row[7]
+        package.departure_time = row[8]
+        package.truck = row[9]
+
+    trucks = {}
+    for truck_id, capacity, speed, mileage, location, load, depart_time, now, hub in columns["trucks"]:
+        truck = Truck(truck_id, capacity, speed, mileage, location, load, depart_time)
+        truck.time = now
+        truck.hub = hub
+        trucks[truck_id] = truck
+    routes = {truck_id: route for truck_id, route in columns["routes"]}
+
+    with open(os.path.join(directory, LOG_NAME), 'rb') as log:
+        log.seek(columns["log_offset"])
+        for line in log:
+            if not line.endswith(b"\n"):
+                break
+            event = json.loads(line)
+            kind = event[0]
+            if kind == PACKAGE_EVENT:
+                package = packages.lookup(event[1])
+                package.status = event[2]
+                package.delivery_time = event[3]
+                package.departure_time = event[4]
+                if len(event) > 5:
+                    package.address, package.location = event[5], event[6]
+            elif kind == TRUCK_EVENT:
+                truck = trucks[event[1]]
+                truck.mileage, truck.time, truck.current_location = event[2], event[3], event[4]
+            elif kind == ROUTE_EVENT:
+                routes[event[1]] = event[2]
+    return packages, list(trucks.values()), routes, dict(columns["flags"]), columns["address_changes"]
@@ -1,52 +1,152 @@
-import csv
-from datetime import datetime, time, timedelta
+from datetime import datetime
+import instrumentation
+from clock import format_am_pm, format_time, to_seconds
+from delivery_logic import get_address_index
+from package_ingest import ingest_packages
+from status_index import describe_status
+
+# Field order of a package record, kept so records can still be indexed like the old tuples
+PACKAGE_FIELDS = ("package_id", "address", "deadline", "weight", "notes", "status", "delivery_time", "departure_time")
+
+# Compact, mutable package record stored in the hash table
+class Package:
+    __slots__ = PACKAGE_FIELDS + ("location", "truck")
+
+    def __init__(self, package_id, address, deadline="", weight="", notes="No special notes", status="At hub", location=None):
+        self.package_id = package_id
+        self.address = address
+        self.deadline = deadline
+        self.weight = weight
+        self.notes = notes
+        self.status = status
+        self.delivery_time = None  # Delivery time in seconds since midnight, initially None
+        self.departure_time = None  # Departure time in seconds since midnight, initially None
+        self.location = location  # Distance matrix index of the address, resolved once on load
+        self.truck = None  # ID of the truck the package is routed on, set by route planning
+
+    # Allow package[5]-style access used by older callers
+    def __getitem__(self, index):
+        return getattr(self, PACKAGE_FIELDS[index])
+
+    def __repr__(self):
+        return f"Package({', '.join(repr(getattr(self, field)) for field in PACKAGE_FIELDS)})"
+
+
+EMPTY = -1  # Marker for an unused slot
+MAX_LOAD_FACTOR = 2 / 3  # Grow the slot array once it is two thirds full
 
 class HashTable:
     def __init__(self, size=40):
-        # Initialize the hash table as a list of empty lists
-        self.size = size
-        # Create a list of empty lists (buckets)
-        self.table = [[] for _ in range(self.size)]
+        # Records are kept densely in insertion order; the slot array holds indices into it
+        self.size = 8
+        while self.size < size:
+            self.size *= 2
+        self._slots = [EMPTY] * self.size
+        self._records = []
+        self.event_log = None  # RunStore that records every update, if the table is persisted
 
-    # Hash function to calculate index for a given key (package_id)
+    # Hash function to calculate the starting slot for a given key (package_id)
     def hash(self, key):
-        return hash(key) % self.size
-    
+        return hash(key) & (self.size - 1)
+
+    # Number of packages stored
+    def __len__(self):
+        return len(self._records)
+
+    # Iterate over package records in insertion order
+    def __iter__(self):
+        return iter(self._records)
+
+    # Find the slot for a key using linear probing; returns (slot, record or None)
+    def _probe(self, key):
+        slots = self._slots
+        records = self._records
+        mask = self.size - 1
+        home = slot = hash(key) & mask
+        while True:
+            index = slots[slot]
+            if index == EMPTY:
+                record = None
+                break
+            record = records[index]
+            if record.package_id == key:
+                break
+            slot = (slot + 1) & mask
+        if instrumentation.enabled:
+            instrumentation.record_probe(((slot - home) & mask) + 1)
+        return slot, record
+
+    # Make room for at least count packages without further resizing
+    def reserve(self, count):
+        size = self.size
+        while count > size * MAX_LOAD_FACTOR:
+            size *= 2
+        if size != self.size:
+            self._resize(size)
+
+    # Rebuild the slot array at a new size; records themselves are not copied
+    def _resize(self, size):
+        self.size = size
+        mask = size - 1
+        slots = [EMPTY] * size
+        for index, record in enumerate(self._records):
+            slot = hash(record.package_id) & mask
+            while slots[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            slots[slot] = index
+        self._slots = slots
+
     # Insert a package into the hash table
     def insert(self, package_id, package_data):
-        index = self.hash(package_id)
-        package_info = (
-            str(package_id),
+        package_id = str(package_id)
+        package_info = Package(
+            package_id,
             package_data[0],  # Address, city, state, and zipcode
             package_data[1] if len(package_data) > 1 else "",  # Deadline
             package_data[2] if len(package_data) > 2 else "",  # Weight
             package_data[3] if len(package_data) > 3 and package_data[3] != "" else "No special notes",  # special notes
-            "At hub",  # Status
-            None,      # Delivery_time, initially None
-            None       # Departure_time, initially None
         )
 
-        # Check if the package already exists in the bucket and update it if found
-        for i, item in enumerate(self.table[index]):
-            if item[0] == str(package_id):
-                self.table[index][i] = package_info
-                return
-        self.table[index].append(package_info)
+        # Replace the package if it already exists
+        slot, existing = self._probe(package_id)
+        if existing is not None:
+            self._records[self._slots[slot]] = package_info
+            return package_info
 
-    # Load package data from a CSV file into the hash table
+        self._slots[slot] = len(self._records)
+        self._records.append(package_info)
+        if len(self._records) > self.size * MAX_LOAD_FACTOR:
+            self._resize(self.size * 2)
+        return package_info
+
+    # Insert many new packages at once from (package ID, address, deadline, weight, notes, location) records.
+    # Existing IDs are left untouched; returns the positions of those duplicate records.
+    def bulk_insert(self, records):
+        self.reserve(len(self._records) + len(records))
+        slots = self._slots
+        store = self._records
+        mask = self.size - 1
+        duplicates = []
+        for position, (package_id, address, deadline, weight, notes, location) in enumerate(records):
+            slot = hash(package_id) & mask
+            while True:
+                index = slots[slot]
+                if index == EMPTY:
+                    break
+                if store[index].package_id == package_id:
+                    duplicates.append(position)
+                    break
+                slot = (slot + 1) & mask
+            if index != EMPTY:
+                continue
+            slots[slot] = len(store)
+            store.append(Package(package_id, address, deadline, weight, notes or "No special notes", location=location))
+        return duplicates
+
+    # Load package data from a CSV file into the hash table; returns an IngestReport of rejected rows
     def load_package_data(self, filename):
-        with open(filename, 'r', newline='', encoding='utf-8-sig') as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header row
-            for row in reader:
-                package_id = row[0]
-                full_address = f"{row[1]}, {row[2]}, {row[3]} {row[4]}"  # Combine address, city, state, and zip
-                deadline = row[5]
-                weight = row[6]
-                special_notes = row[7] if len(row) > 7 else ""
-                package_data = [full_address, deadline, weight, special_notes]
-                self.insert(package_id, package_data)
-                
+        return ingest_packages(self, filename)
+
     # Print all packages stored in the hash table with headers for better readability        
     def print_all_packages(self):
         # Print header 
@@ -56,145 +156,105 @@ class HashTable:
         print("-" * 150)  # Separator line 
 
         # Iterate through all packages in the hash table
-        for index, bucket in enumerate(self.table):
-            if bucket:  
-                for package in bucket:
-                    delivery_time = package[6]
-                    departure_time = package[7]
-                    
-                    # Format times as HH:MM:SS or keep them as None
-                    formatted_delivery = delivery_time.strftime('%H:%M:%S') if isinstance(delivery_time, datetime) else str(delivery_time)
-                    formatted_departure = departure_time.strftime('%H:%M:%S') if isinstance(departure_time, datetime) else str(departure_time)
-                    
-                    # Abbreviate long addresses and special notes
-                    abbreviated_address = (package[1][:37] + '...') if len(package[1]) > 40 else package[1]
-                    abbreviated_notes = (package[4][:27] + '...') if len(package[4]) > 30 else package[4]
-                    
-                    # Print each package's details in a formatted way
-                    print("{:<10} {:<40} {:<12} {:<12} {:<30} {:<12} {:<12} {:<12}".format(
-                        package[0], abbreviated_address, package[2], package[3], abbreviated_notes, package[5], formatted_delivery, formatted_departure))
+        for package in self._records:
+            delivery_time = package.delivery_time
+            departure_time = package.departure_time
+
+            # Format times as H:MM:SS or keep them as None
+            formatted_delivery = format_time(delivery_time) if delivery_time is not None else "None"
+            formatted_departure = format_time(departure_time) if departure_time is not None else "None"
+
+            # Abbreviate long addresses and special notes
+            abbreviated_address = (package.address[:37] + '...') if len(package.address) > 40 else package.address
+            abbreviated_notes = (package.notes[:27] + '...') if len(package.notes) > 30 else package.notes
+
+            # Print each package's details in a formatted way
+            print("{:<10} {:<40} {:<12} {:<12} {:<30} {:<12} {:<12} {:<12}".format(
+                package.package_id, abbreviated_address, package.deadline, package.weight, abbreviated_notes, package.status, formatted_delivery, formatted_departure))
 
 
     # Look up a specific package by its ID and return its details
     def lookup(self, package_id):
-        index = self.hash(package_id)
-        for package in self.table[index]:
-            if str(package[0]) == str(package_id):
-                return package
-        return None
+        return self._probe(str(package_id))[1]
     
     # Update details of a specific package (status, delivery time, departure time, or address)
     def update_package_details(self, package_id, status=None, delivery_time=None, departure_time=None, new_address=None):
-        index = self.hash(package_id)
-        for i, package in enumerate(self.table[index]):
-            if str(package[0]) == str(package_id):
-                package_list = list(package)
-
-                if status:
-                    # Checks if status updates
-                    #print(f"Updating status for Package {package_id} to {status}")
-                    package_list[5] = status
-
-                if delivery_time:
-                    # Checks if delivery time updates
-                    #print(f"Updating delivery time for Package {package_id} to {delivery_time}")
-                    delivery_time = self._parse_time(delivery_time)
-                    package_list[6] = delivery_time
-
-                if departure_time:
-                    # Checks if departure time updates
-                    #print(f"Updating departure time for Package {package_id} to {departure_time}")
-                    departure_time = self._parse_time(departure_time)
-                    package_list[7] = departure_time
-
-                # Special condition for package #9
-                if package_id == '9' and new_address:
-                    current_time = departure_time or package_list[7]
-                    update_time = datetime.combine(datetime.min, time(10, 20))
-                    
-                    if isinstance(current_time, timedelta):
-                        current_datetime = datetime.min + current_time
-                    elif isinstance(current_time, datetime):
-                        current_datetime = current_time
-                    else:
-                        print(f"Unexpected time format for Package 9: {current_time}")
-                        return False
-
-                    if current_datetime >= update_time:
-                        package_list[1] = new_address
-                        print(f"Updated address for Package 9 at {current_datetime.time()}")
-                    else:
-                        print(f"Address update for Package 9 is scheduled for 10:20 AM. Current time: {current_datetime.time()}")
-                elif new_address:
-                    # Checks if address updates
-                    #print(f"Updating address for Package {package_id} to {new_address}")
-                    package_list[1] = new_address
-
-                self.table[index][i] = tuple(package_list)
-                return True
-
-        return False
-
-    # Helper function to parse time strings into datetime objects
+        package = self.lookup(package_id)
+        if package is None:
+            return False
+
+        if status:
+            # Checks if status updates
+            #print(f"Updating status for Package {package_id} to {status}")
+            package.status = status
+
+        if delivery_time is not None:
+            # Checks if delivery time updates
+            #print(f"Updating delivery time for Package {package_id} to {delivery_time}")
+            package.delivery_time = self._parse_time(delivery_time)
+
+        if departure_time is not None:
+            # Checks if departure time updates
+            #print(f"Updating departure time for Package {package_id} to {departure_time}")
+            departure_time = self._parse_time(departure_time)
+            package.departure_time = departure_time
+
+        if new_address:
+            # Checks if address updates
+            #print(f"Updating address for Package {package_id} to {new_address}")
+            package.address = new_address
+            package.location = get_address_index(new_address)
+
+        if self.event_log is not None:
+            self.event_log.package_changed(package, address_changed=bool(new_address))
+        return True
+
+    # Update every package delivered at one stop together: the times are parsed once for the whole group.
+    # Returns the number of packages updated.
+    def update_stop(self, package_ids, status=None, delivery_time=None, departure_time=None):
+        delivery_time = self._parse_time(delivery_time)
+        departure_time = self._parse_time(departure_time)
+        updated = 0
+        for package_id in package_ids:
+            package = self.lookup(package_id)
+            if package is None:
+                continue
+            if status:
+                package.status = status
+            if delivery_time is not None:
+                package.delivery_time = delivery_time
+            if departure_time is not None:
+                package.departure_time = departure_time
+            if self.event_log is not None:
+                self.event_log.package_changed(package)
+            updated += 1
+        return updated
+
+    # Helper function to convert a time (HH:MM:SS text, datetime, timedelta or seconds) to seconds since midnight
     def _parse_time(self, time_value):
-        if isinstance(time_value, str):
-            try:
-                return datetime.strptime(time_value, '%H:%M:%S')
-            except ValueError as e:
-                print(f"Error parsing time: {e}")
-                return None
-        return time_value    
+        try:
+            return to_seconds(time_value)
+        except ValueError as e:
+            instrumentation.warn(f"Error parsing time: {e}")
+            return None
     
         
-    # Check_time must be in the format of a datetime object to perform comparisons with departure_time and delivery_time    
+    # Check_time may be a datetime, HH:MM:SS text or seconds since midnight; it is compared as seconds
     def check_package_status(self, package_id, check_time=None):
         package = self.lookup(package_id)
         
         if not package:
             return f"Package {package_id} not found"
 
-        # Extract times and status from the package tuple
-        departure_time = package[7]  
-        delivery_time = package[6]   
-        status = package[5]          
-        
         # Use current time if no check time is provided
         if check_time is None:
             check_time = datetime.now()
-
-        # Checks if times and status are updated
-        #print(f"Package {package_id}, Check time={check_time}, Departure time={departure_time}, Delivery time={delivery_time}, Status={status}")
-
-        if isinstance(departure_time, timedelta):
-            departure_time = datetime.combine(check_time.date(), datetime.min.time()) + departure_time
-        
-        if isinstance(delivery_time, timedelta):
-            delivery_time = datetime.combine(check_time.date(), datetime.min.time()) + delivery_time
-
-        if departure_time is None:
-            return f"Package {package_id} is at the hub as of {check_time.strftime('%I:%M %p')}"
-
-        if delivery_time is None:
-            if check_time >= departure_time:
-                return f"Package {package_id} is en route as of {check_time.strftime('%I:%M %p')}"
-            else:
-                return f"Package {package_id} is at the hub as of {check_time.strftime('%I:%M %p')}"
-
-        # Check if the package has been delivered
-        if check_time >= delivery_time:
-            return f"Package {package_id} was delivered at {delivery_time.strftime('%I:%M %p')}"
-
-        # Check if the package is en route
-        elif departure_time <= check_time < delivery_time:
-            return f"Package {package_id} is en route as of {check_time.strftime('%I:%M %p')}"
-
-        # If none of these conditions are met, it's still at the hub
-        else:
-            return f"Package {package_id} is at the hub as of {check_time.strftime('%I:%M %p')}"   
+        return describe_status(package_id, package.departure_time, package.delivery_time, self._parse_time(check_time))
     
     # Check the status of all packages on a given truck at a specific time and update their details
     def check_all_truck_packages(self, truck, check_time):
-        print(f"\n--- Checking status of all packages on truck {truck.id} at {check_time.strftime('%I:%M:%S %p')} ---")
+        check_time = self._parse_time(check_time)
+        print(f"\n--- Checking status of all packages on truck {truck.id} at {format_am_pm(check_time, with_seconds=True)} ---")
         
         for package_id in truck.packages:
             package_id_str = str(package_id)
@@ -209,20 +269,13 @@ class HashTable:
             package = self.lookup(package_id_str)
             
             if package:
-                departure_time = package[7]  
-                delivery_time = package[6]   
-                
-                # Convert departure_time and delivery_time to datetime if they are timedelta
-                if isinstance(departure_time, timedelta):
-                    departure_time = datetime.combine(check_time.date(), datetime.min.time()) + departure_time
-                
-                if isinstance(delivery_time, timedelta):
-                    delivery_time = datetime.combine(check_time.date(), datetime.min.time()) + delivery_time
+                departure_time = package.departure_time
+                delivery_time = package.delivery_time
 
                 # Update departure or delivery times based on current status
                 if "en route" in status.lower() and departure_time is None:
-                    self.update_package_details(package_id_str, departure_time=check_time.strftime('%H:%M:%S'))
+                    self.update_package_details(package_id_str, departure_time=check_time)
                 
                 elif "delivered" in status.lower() and delivery_time is None:
-                    self.update_package_details(package_id_str, delivery_time=check_time.strftime('%H:%M:%S'))
+                    self.update_package_details(package_id_str, delivery_time=check_time)
 
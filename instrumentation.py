@@ -0,0 +1,126 @@
+import atexit
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+# Process-wide switch. Hot paths check it before doing any bookkeeping, so a disabled run only pays
+# for one attribute lookup per call site.
+enabled = False
+quiet = False  # Drop warning text (still counted while enabled)
+warning_stream = None  # File warnings are printed to; None means stdout
+
+counters = Counter()  # name -> count
+timers = {}  # name -> [calls, total seconds]
+_profiler = None
+
+# Add to a named counter
+def count(name, amount=1):
+    if enabled:
+        counters[name] += amount
+
+# Record one HashTable probe sequence of the given length (1 = found or placed at the home slot)
+def record_probe(length):
+    counters["hash_table.lookups"] += 1
+    counters["hash_table.probes"] += length
+    if length > counters["hash_table.max_probe"]:
+        counters["hash_table.max_probe"] = length
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        entry = timers.setdefault(self.name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - self.start
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+# Context manager that adds the time spent in its block to a named timer (a shared no-op when disabled)
+def timer(name):
+    return _Timer(name) if enabled else _NULL_TIMER
+
+# Report a recoverable problem; replaces the bare print calls so warnings can be counted or silenced
+def warn(message):
+    if enabled:
+        counters["warnings"] += 1
+    if not quiet:
+        print(f"Warning: {message}", file=warning_stream)
+
+# Current counters and timers as plain data
+def metrics():
+    lookups = counters.get("hash_table.lookups", 0)
+    return {
+        "counters": dict(counters),
+        "timers": {name: {"calls": calls, "seconds": round(seconds, 6)} for name, (calls, seconds) in timers.items()},
+        "hash_table.mean_probe": round(counters["hash_table.probes"] / lookups, 4) if lookups else None,
+    }
+
+def write_metrics(filename):
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(metrics(), file, indent=2, sort_keys=True)
+
+def reset():
+    counters.clear()
+    timers.clear()
+
+# Turn instrumentation on. metrics_file gets a JSON dump of counters and timers at exit; profile_file
+# gets cProfile data (pstats binary, or a text report sorted by cumulative time if it ends in .txt).
+def enable(metrics_file=None, profile_file=None):
+    global enabled, _profiler
+    enabled = True
+    if metrics_file:
+        atexit.register(write_metrics, metrics_file)
+    if profile_file and _profiler is None:
+        import cProfile  # Only profiled runs pay for importing the profiler
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(_write_profile, profile_file)
+
+def disable():
+    global enabled
+    enabled = False
+
+def _write_profile(filename):
+    _profiler.disable()
+    if filename.endswith(".txt"):
+        import pstats
+        with open(filename, 'w', encoding='utf-8') as file:
+            pstats.Stats(_profiler, stream=file).sort_stats("cumulative").print_stats(50)
+    else:
+        _profiler.dump_stats(filename)
+
+# Configure from WGUPS_METRICS (JSON metrics path), WGUPS_PROFILE (profile path) and WGUPS_QUIET (any value
+# silences warnings); instrumentation stays off unless one of the output paths is set
+def configure_from_environment(environ=os.environ):
+    global quiet
+    quiet = bool(environ.get("WGUPS_QUIET"))
+    metrics_file = environ.get("WGUPS_METRICS")
+    profile_file = environ.get("WGUPS_PROFILE")
+    if metrics_file or profile_file:
+        enable(metrics_file, profile_file)
+
+# Print counters and timers, e.g. at the end of a benchmark
+def print_metrics(stream=sys.stdout):
+    for name, (calls, seconds) in sorted(timers.items()):
+        print(f"{name:<40} {calls:>8} calls {seconds:>10.4f} s", file=stream)
+    for name, value in sorted(counters.items()):
+        print(f"{name:<40} {value:>12}", file=stream)
@@ -0,0 +1,112 @@
+import marshal
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+from clock import parse_clock, to_seconds
+from status_index import describe_status
+
+# Fast single-package status lookups for short-lived calls. Answers come from a results file written after one
+# full simulation of the standard day; the CSVs, the distance matrix and the simulation are only touched when
+# that file is missing or older than its inputs. Only this module, clock and status_index load on the fast path.
+
+RESULTS_FILE = "CSV/day_results.cache"
+RESULTS_MAGIC = b"WGURES1"
+INPUT_FILES = ("CSV/address.csv", "CSV/distance.csv", "CSV/package.csv")
+PROGRAM_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Size and modification time of every input and program module; results built from other files are stale
+def source_stamp():
+    paths = list(INPUT_FILES) + sorted(
+        entry.path for entry in os.scandir(PROGRAM_DIRECTORY) if entry.name.endswith(".py"))
+    stamp = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        stamp.append((path, info.st_size, info.st_mtime_ns))
+    return stamp
+
+# {package ID: (departure, delivery)} from a results file, or None if it is missing, unreadable or stale
+def load_results(filename, stamp):
+    try:
+        with open(filename, 'rb') as file:
+            header = file.read(len(RESULTS_MAGIC) + 1)
+            if header[:-1] != RESULTS_MAGIC or header[-1] != marshal.version:
+                return None
+            results = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return results["packages"] if results.get("stamp") == stamp else None
+
+# Simulate the standard day (as main.py does) and write every package's times to the results file
+def build_results(filename, stamp):
+    import instrumentation  # The simulation stack is only imported when the results have to be rebuilt
+    from main import simulate_standard_day
+
+    instrumentation.warning_stream = sys.stderr  # Keep stdout for the answers
+    package_hash, _, _ = simulate_standard_day()
+    packages = {package.package_id: (package.departure_time, package.delivery_time) for package in package_hash}
+
+    temp_path = f"{filename}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(RESULTS_MAGIC + bytes([marshal.version]))
+        file.write(marshal.dumps({"stamp": stamp, "packages": packages}))
+    os.replace(temp_path, filename)
+    return packages
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Status of WGUPS packages on the standard day, from precomputed results")
+    parser.add_argument("package_ids", nargs="+", metavar="PACKAGE")
+    parser.add_argument("--at", metavar="HH:MM:SS", help="time of day to report the status at (default: now)")
+    parser.add_argument("--results", default=RESULTS_FILE, help="results file, rebuilt when missing or out of date")
+    parser.add_argument("--rebuild", action="store_true", help="re-run the simulation even if the results are current")
+    return parser
+
+# Importing argparse (and the re module it pulls in) takes longer than the rest of a lookup, so plain command
+# lines are read here and argparse only runs for --help and anything this does not recognize
+def parse_arguments(argv):
+    options = {"package_ids": [], "at": None, "results": RESULTS_FILE, "rebuild": False}
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument in ("--at", "--results"):
+            value = next(arguments, None)
+            if value is None:
+                return build_parser().parse_args(argv)
+            options[argument[2:]] = value
+        elif argument == "--rebuild":
+            options["rebuild"] = True
+        elif argument.startswith("-"):
+            return build_parser().parse_args(argv)
+        else:
+            options["package_ids"].append(argument)
+    if not options["package_ids"]:
+        return build_parser().parse_args(argv)  # Reports the missing package ID
+    return SimpleNamespace(**options)
+
+def main(argv=None):
+    args = parse_arguments(sys.argv[1:] if argv is None else argv)
+    try:
+        at = parse_clock(args.at) if args.at else to_seconds(datetime.now())
+    except ValueError as e:
+        build_parser().error(str(e))
+
+    stamp = source_stamp()
+    packages = None if args.rebuild else load_results(args.results, stamp)
+    if packages is None:
+        packages = build_results(args.results, stamp)
+
+    found = True
+    for package_id in args.package_ids:
+        times = packages.get(package_id.strip())
+        if times is None:
+            print(f"Package {package_id} not found")
+            found = False
+        else:
+            print(describe_status(package_id.strip(), times[0], times[1], at))
+    return 0 if found else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import csv
+import json
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from itertools import compress
+from clock import format_clock, parse_clock_time, to_seconds
+from status_index import AT_HUB, DELIVERED, EN_ROUTE
+
+STATUS_CODES = {AT_HUB: 0, EN_ROUTE: 1, DELIVERED: 2}
+STATUS_NAMES = (AT_HUB, EN_ROUTE, DELIVERED)
+MISSING = -1  # Stand-in for None (no time, EOD deadline, no truck, unknown location) in the int columns
+PACKAGE_REPORT_FIELDS = ("package_id", "truck", "status", "deadline", "departure", "delivery", "on_time")
+
+# Read-only columnar copy of a package table: one compact array per field instead of one object per package.
+# Fleet-wide reports run over whole columns with C-level builtins (zip, compress, Counter, sorted) rather than
+# attribute lookups record by record. Build it after the simulation; it does not follow later table changes.
+class PackageColumns:
+    def __init__(self, packages):
+        records = list(packages)
+        deadlines = {}  # Manifests repeat a handful of deadline strings; parse each once
+        for package in records:
+            if package.deadline not in deadlines:
+                deadline = parse_clock_time(package.deadline) if package.deadline else None
+                deadlines[package.deadline] = MISSING if deadline is None else deadline
+
+        def column(typecode, values):
+            return array(typecode, [MISSING if value is None else value for value in values])
+
+        self.ids = [package.package_id for package in records]
+        self.location = column('i', (package.location for package in records))
+        self.truck = column('i', (package.truck for package in records))
+        self.deadline = array('i', [deadlines[package.deadline] for package in records])
+        self.status = array('b', [STATUS_CODES.get(package.status, 0) for package in records])
+        self.departure = column('i', (package.departure_time for package in records))
+        self.delivery = column('i', (package.delivery_time for package in records))
+        self._sorted = None  # (departures, deliveries) sorted with MISSING dropped, built by the first status query
+
+    def __len__(self):
+        return len(self.ids)
+
+    # 1 for each delivered package that met its deadline (EOD always does), else 0
+    def on_time_mask(self):
+        return bytes(delivery != MISSING and (deadline == MISSING or delivery <= deadline)
+                     for delivery, deadline in zip(self.delivery, self.deadline))
+
+    # 1 for each package delivered after its deadline
+    def late_mask(self):
+        return bytes(delivery != MISSING and deadline != MISSING and delivery > deadline
+                     for delivery, deadline in zip(self.delivery, self.deadline))
+
+    # (packages on time, packages delivered, on-time share of delivered packages)
+    def on_time_rate(self):
+        on_time = sum(self.on_time_mask())
+        delivered = len(self.delivery) - self.delivery.count(MISSING)
+        return on_time, delivered, on_time / delivered if delivered else None
+
+    # {truck ID: late packages}, trucks without late packages omitted
+    def late_by_truck(self):
+        return dict(Counter(compress(self.truck, self.late_mask())))
+
+    # {truck ID: packages carried}
+    def packages_by_truck(self):
+        counts = Counter(self.truck)
+        counts.pop(MISSING, None)
+        return dict(counts)
+
+    # Package counts per state at a time of day, by bisecting the sorted departure and delivery columns
+    def status_counts(self, at):
+        if self._sorted is None:
+            self._sorted = tuple(_sorted_times(times) for times in (self.departure, self.delivery))
+        at = to_seconds(at)
+        departed = bisect_right(self._sorted[0], at)
+        delivered = bisect_right(self._sorted[1], at)
+        return {AT_HUB: len(self.ids) - departed, EN_ROUTE: departed - delivered, DELIVERED: delivered}
+
+    # Rows of the per-package report, produced one at a time. Times repeat heavily (stops share arrival times),
+    # so each distinct value is formatted once.
+    def package_rows(self):
+        labels = {time: format_clock(time) for time in {*self.deadline, *self.departure, *self.delivery}}
+        labels[MISSING] = None
+        deadlines = {**labels, MISSING: "EOD"}
+        on_time = (None if delivery == MISSING else bool(met) for delivery, met in zip(self.delivery, self.on_time_mask()))
+        trucks = (None if truck == MISSING else truck for truck in self.truck)
+        return zip(
+            self.ids, trucks, map(STATUS_NAMES.__getitem__, self.status), map(deadlines.__getitem__, self.deadline),
+            map(labels.__getitem__, self.departure), map(labels.__getitem__, self.delivery), on_time,
+        )
+
+    # Stream the per-package report to an open text file as CSV
+    def write_package_csv(self, file):
+        writer = csv.writer(file)
+        writer.writerow(PACKAGE_REPORT_FIELDS)
+        writer.writerows(self.package_rows())
+
+    # Stream the per-package report to an open text file as JSON Lines
+    def write_package_jsonl(self, file):
+        encode = json.JSONEncoder().encode
+        file.writelines(encode(dict(zip(PACKAGE_REPORT_FIELDS, row))) + "\n" for row in self.package_rows())
+
+    # Fleet summary: on-time rate, late packages and mileage per truck, and status counts at each query time
+    def fleet_report(self, trucks, at_times=()):
+        on_time, delivered, rate = self.on_time_rate()
+        late = self.late_by_truck()
+        carried = self.packages_by_truck()
+        return {
+            "packages": len(self.ids),
+            "delivered": delivered,
+            "on_time": on_time,
+            "on_time_rate": round(rate, 4) if rate is not None else None,
+            "trucks": [
+                {"truck": truck.id, "packages": carried.get(truck.id, 0), "late": late.get(truck.id, 0),
+                 "mileage": round(truck.mileage, 2)}
+                for truck in trucks
+            ],
+            "total_mileage": round(sum(truck.mileage for truck in trucks), 2),
+            "status_at": {format_clock(to_seconds(at)): self.status_counts(at) for at in at_times},
+        }
+
+def _sorted_times(times):
+    # MISSING (-1) sorts first, so it is a prefix to cut off
+    ordered = array('i', sorted(times))
+    return ordered[bisect_right(ordered, MISSING):]
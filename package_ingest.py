@@ -0,0 +1,106 @@
+import csv
+import gc
+import gzip
+import io
+import os
+from clock import parse_am_pm
+from delivery_logic import resolve_address
+
+MIN_COLUMNS = 7  # Package ID, address, city, state, zip, deadline, weight (notes are optional)
+ESTIMATED_ROW_BYTES = 64  # Used to pre-size the table from the file size
+
+# Outcome of loading a package manifest
+class IngestReport:
+    __slots__ = ("loaded", "rejected", "unresolved")
+
+    def __init__(self):
+        self.loaded = 0
+        self.rejected = []  # (line number, reason) for rows that were not loaded
+        self.unresolved = []  # IDs of loaded packages whose address is not in the address table
+
+# Open a manifest as text, transparently decompressing gzip files (detected by their magic bytes)
+def open_manifest(filename):
+    with open(filename, 'rb') as file:
+        compressed = file.read(2) == b"\x1f\x8b"
+    if compressed:
+        return io.TextIOWrapper(gzip.open(filename, 'rb'), encoding='utf-8-sig', newline='')
+    return open(filename, 'r', newline='', encoding='utf-8-sig')
+
+# Check one CSV row; returns the reason it is invalid, or None.
+# valid_deadlines caches deadline strings already seen to be well formed (manifests repeat a handful of them).
+def validate_row(row, valid_deadlines):
+    if len(row) < MIN_COLUMNS:
+        return f"expected at least {MIN_COLUMNS} columns, found {len(row)}"
+    if not row[0].strip():
+        return "missing package ID"
+    if not row[1].strip():
+        return "missing address"
+    if row[5] not in valid_deadlines:
+        # Parsed the way routing will parse it, so out-of-range times such as "13:30 PM" are caught here
+        deadline = row[5].strip()
+        if deadline != "EOD":
+            try:
+                parse_am_pm(deadline)
+            except ValueError:
+                return f"invalid deadline '{row[5]}'"
+        valid_deadlines.add(row[5])
+    try:
+        float(row[6])
+    except ValueError:
+        return f"invalid weight '{row[6]}'"
+    return None
+
+# Read a manifest in chunks of validated (package ID, full address, deadline, weight, notes, location) records
+# plus the CSV line number of each. Only one chunk is held in memory at a time; invalid rows go on the report.
+def read_chunks(filename, report, chunk_size=50000):
+    locations = {}  # Many packages share an address; resolve each distinct address once
+    valid_deadlines = set()
+    with open_manifest(filename) as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Skip header row
+        records = []
+        line_numbers = []
+        for line_number, row in enumerate(reader, start=2):
+            reason = validate_row(row, valid_deadlines)
+            if reason:
+                report.rejected.append((line_number, reason))
+                continue
+            full_address = f"{row[1]}, {row[2]}, {row[3]} {row[4]}"  # Combine address, city, state, and zip
+            location = locations.get(full_address, -1)
+            if location == -1:
+                location = locations[full_address] = resolve_address(full_address)
+            records.append((row[0].strip(), full_address, row[5].strip(), row[6], row[7] if len(row) > 7 else "", location))
+            line_numbers.append(line_number)
+            if len(records) >= chunk_size:
+                yield records, line_numbers
+                records = []
+                line_numbers = []
+        if records:
+            yield records, line_numbers
+
+# Stream a package manifest (plain or gzip CSV) into the hash table with bulk inserts.
+# Rows that fail validation or repeat an earlier package ID are reported instead of loaded.
+def ingest_packages(table, filename, chunk_size=50000, expected_rows=None):
+    # Millions of new records would otherwise trigger repeated full garbage collection passes
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _ingest(table, filename, chunk_size, expected_rows)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def _ingest(table, filename, chunk_size, expected_rows):
+    report = IngestReport()
+    if expected_rows is None:
+        expected_rows = os.path.getsize(filename) // ESTIMATED_ROW_BYTES
+    table.reserve(len(table) + expected_rows)
+
+    for records, line_numbers in read_chunks(filename, report, chunk_size):
+        duplicates = set(table.bulk_insert(records))
+        for position in sorted(duplicates):
+            report.rejected.append((line_numbers[position], f"duplicate package ID '{records[position][0]}'"))
+        report.loaded += len(records) - len(duplicates)
+        report.unresolved.extend(record[0] for position, record in enumerate(records)
+                                 if record[5] is None and position not in duplicates)
+    return report
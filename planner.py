@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor
+from delivery_logic import get_address_index
+from distance_matrix import load_distance_matrix
+from route_improvement import improve_route, route_mileage
+from routing_engine import RoutePlan, build_route, load_constraints, merge_plan, routable_items, truck_assignments
+
+_distances = None  # Distance matrix mapped once per worker process
+
+# Worker initializer: map the distance cache so every worker shares the same physical pages
+def _load_worker_distances(distance_file, closure):
+    global _distances
+    _distances = load_distance_matrix(distance_file, closure=closure)
+
+# Plan a single truck inside a worker: deadline-aware ordering, then the optional improvement pass, which keeps
+# every deadline the ordering met
+def _plan_truck(task):
+    truck_id, items, hub_index, depart_time, speed, improve, time_budget = task
+    route, flags = build_route(items, _distances, hub_index, depart_time, speed)
+    greedy_mileage = improved_mileage = None
+    if improve:
+        locations = {package_id: location for package_id, location, _ in items}
+        greedy_mileage = route_mileage(route, locations, _distances, hub_index)
+        deadlines = {package_id: deadline for package_id, _, deadline in items}
+        route = improve_route(route, locations, _distances, hub_index, time_budget, deadlines=deadlines,
+                              depart_time=depart_time, speed=speed)
+        improved_mileage = route_mileage(route, locations, _distances, hub_index)
+    return truck_id, route, flags, greedy_mileage, improved_mileage
+
+# Plan every truck's route across a process pool and merge the results back into the trucks and package table.
+# Workers memory-map distance_file's binary cache (its shortest-path closure with closure) instead of receiving
+# a pickled copy of the matrix.
+def plan_routes_parallel(trucks, packages, distance_file, workers=None, improve=False, time_budget=1.0, constraints=None,
+                         closure=False):
+    if constraints is None:
+        constraints = load_constraints(packages)
+    plan = RoutePlan()
+    truck_of = truck_assignments(trucks)
+
+    # Constraint checks need the package table, so they stay in this process; workers only see plain tuples
+    tasks = [
+        (truck.id, routable_items(truck, packages, constraints, truck_of, plan), get_address_index(truck.hub),
+         truck.depart_time, truck.speed, improve, time_budget)
+        for truck in trucks
+    ]
+
+    # Build the cache before the pool starts so workers never race to write it
+    load_distance_matrix(distance_file, closure=closure)
+    trucks_by_id = {truck.id: truck for truck in trucks}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_distances, initargs=(distance_file, closure)) as pool:
+        for truck_id, route, flags, greedy_mileage, improved_mileage in pool.map(_plan_truck, tasks):
+            plan.routes[truck_id] = route
+            for package_id, reason in flags.items():
+                plan.flag(package_id, reason)
+            if improve:
+                trucks_by_id[truck_id].greedy_mileage = greedy_mileage
+                trucks_by_id[truck_id].improved_mileage = improved_mileage
+
+    merge_plan(plan, packages, truck_of)
+    return plan
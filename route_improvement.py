@@ -0,0 +1,229 @@
+import time
+from clock import travel_seconds
+
+IMPROVEMENT_EPSILON = 1e-9  # Ignore "improvements" that are only floating point noise
+TIME_CHECK_INTERVAL = 1024  # Candidate moves a pass scans between checks of its time limit
+
+# Collapse a route of package IDs into its sequence of stops (location index, package IDs at that stop).
+# locations maps each package ID to its distance matrix index.
+def route_to_stops(route, locations):
+    stops = []
+    for package_id in route:
+        location = locations[package_id]
+        if stops and stops[-1][0] == location:
+            stops[-1][1].append(package_id)
+        else:
+            stops.append((location, [package_id]))
+    return stops
+
+# Total miles for a route that starts and ends at the hub
+def route_mileage(route, locations, distances, hub_index):
+    mileage = 0.0
+    current = hub_index
+    for location, _ in route_to_stops(route, locations):
+        mileage += distances[current][location]
+        current = location
+    return mileage + distances[current][hub_index]
+# Reverse tour[i:j+1] in place
+def reverse_segment(tour, i, j):
+    tour[i:j + 1] = reversed(tour[i:j + 1])
+
+# Move the length stops starting at tour[i] to just after tour[p], in place
+def move_segment(tour, i, length, p):
+    segment = tour[i:i + length]
+    del tour[i:i + length]
+    insert_at = p + 1 if p < i else p + 1 - length
+    tour[insert_at:insert_at] = segment
+
+# Arrival times along a tour (hub first and last) and each stop's deadline, kept by tour position so that
+# repeated visits to a location are told apart. Tells whether a candidate move would make an on-time stop
+# late by walking only the reversed or moved stops: every other stop keeps its legs, so its arrival just
+# shifts by a constant, which is compared with the smallest slack over its range of positions. Stops already
+# late on the starting tour are exempt. The tables are rebuilt only when a move is applied.
+class DeadlineGuard:
+    __slots__ = ("tour", "due", "distances", "depart_time", "speed", "arrival", "slack")
+
+    # due is the deadline (seconds since midnight, or None) of the stop at each tour position
+    def __init__(self, tour, due, distances, depart_time, speed):
+        self.tour = tour
+        self.due = list(due)
+        self.distances = distances
+        self.depart_time = depart_time
+        self.speed = speed
+        self.refresh()
+        for position, deadline in enumerate(self.due):
+            if deadline is not None and self.arrival[position] > deadline:
+                self.due[position] = None
+        self.refresh()
+
+    def leg(self, a, b):
+        return travel_seconds(self.distances[a][b], self.speed)
+
+    # Recompute arrivals and the sparse table of slack minima (slack[level][k] covers 2**level positions)
+    def refresh(self):
+        tour = self.tour
+        arrival = [self.depart_time]
+        for previous, location in zip(tour, tour[1:]):
+            arrival.append(arrival[-1] + self.leg(previous, location))
+        self.arrival = arrival
+        level = [float('inf') if deadline is None else deadline - arrived for deadline, arrived in zip(self.due, arrival)]
+        self.slack = [level]
+        width = 1
+        while 2 * width <= len(tour):
+            level = [min(level[k], level[k + width]) for k in range(len(level) - width)]
+            self.slack.append(level)
+            width *= 2
+
+    # Smallest slack over positions lo..hi (inf for an empty range)
+    def min_slack(self, lo, hi):
+        if lo > hi:
+            return float('inf')
+        level = (hi - lo + 1).bit_length() - 1
+        row = self.slack[level]
+        return min(row[lo], row[hi - (1 << level) + 1])
+
+    # Whether stops that now arrive shift seconds later at positions lo..hi all stay on time
+    def shift_allowed(self, shift, lo, hi):
+        return shift <= 0 or shift <= self.min_slack(lo, hi)
+
+    # Walk stops (by old position) in their new order from location previous at time clock; returns the
+    # arrival at the last of them, or None if one of them would be late
+    def walk(self, positions, previous, clock):
+        tour, due = self.tour, self.due
+        for position in positions:
+            clock += self.leg(previous, tour[position])
+            if due[position] is not None and clock > due[position]:
+                return None
+            previous = tour[position]
+        return clock
+
+    def allows_reversal(self, i, j):
+        tour = self.tour
+        clock = self.walk(range(j, i - 1, -1), tour[i - 1], self.arrival[i - 1])
+        if clock is None:
+            return False
+        shift = clock + self.leg(tour[i], tour[j + 1]) - self.arrival[j + 1]
+        return self.shift_allowed(shift, j + 1, len(tour) - 1)
+
+    def allows_move(self, i, length, p):
+        tour, arrival = self.tour, self.arrival
+        end = i + length - 1
+        segment = range(i, end + 1)
+        if p < i:
+            # tour[p], segment, tour[p+1..i-1], tour[end+1], ...
+            clock = self.walk(segment, tour[p], arrival[p])
+            if clock is None:
+                return False
+            middle_shift = clock + self.leg(tour[end], tour[p + 1]) - arrival[p + 1]
+            if not self.shift_allowed(middle_shift, p + 1, i - 1):
+                return False
+            tail = end + 1
+            clock = arrival[i - 1] + middle_shift + self.leg(tour[i - 1], tour[tail])
+        else:
+            # tour[i-1], tour[end+1..p], segment, tour[p+1], ...
+            middle_shift = arrival[i - 1] + self.leg(tour[i - 1], tour[end + 1]) - arrival[end + 1]
+            if not self.shift_allowed(middle_shift, end + 1, p):
+                return False
+            clock = self.walk(segment, tour[p], arrival[p] + middle_shift)
+            if clock is None:
+                return False
+            tail = p + 1
+            clock += self.leg(tour[end], tour[tail])
+        return self.shift_allowed(clock - arrival[tail], tail, len(tour) - 1)
+
+    # Follow a move the pass has just applied to the tour
+    def reversed(self, i, j):
+        reverse_segment(self.due, i, j)
+        self.refresh()
+
+    def moved(self, i, length, p):
+        move_segment(self.due, i, length, p)
+        self.refresh()
+
+# Reverse tour[i:j+1] whenever that shortens the tour and guard (if given) allows it;
+# returns True if a move was applied. Gives up without a move once time.perf_counter() passes stop_at.
+def two_opt_pass(tour, distances, guard=None, stop_at=None):
+    checked = 0
+    for i in range(1, len(tour) - 2):
+        a, b = tour[i - 1], tour[i]
+        row_a, row_b = distances[a], distances[b]
+        for j in range(i + 1, len(tour) - 1):
+            checked += 1
+            if stop_at is not None and checked % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > stop_at:
+                return False
+            c, e = tour[j], tour[j + 1]
+            # Only the two edges around the reversed segment change (the matrix is symmetric)
+            delta = row_a[c] + row_b[e] - row_a[b] - distances[c][e]
+            if delta < -IMPROVEMENT_EPSILON and (guard is None or guard.allows_reversal(i, j)):
+                reverse_segment(tour, i, j)
+                if guard is not None:
+                    guard.reversed(i, j)
+                return True
+    return False
+
+# Move a run of 1-3 consecutive stops to a cheaper position that guard (if given) allows;
+# returns True if a move was applied. Gives up without a move once time.perf_counter() passes stop_at.
+def or_opt_pass(tour, distances, max_segment=3, guard=None, stop_at=None):
+    last = len(tour) - 1  # tour[last] is the hub return and never moves
+    checked = 0
+    for length in range(1, max_segment + 1):
+        for i in range(1, last - length + 1):
+            first, end = tour[i], tour[i + length - 1]
+            prev, nxt = tour[i - 1], tour[i + length]
+            removal_gain = distances[prev][first] + distances[end][nxt] - distances[prev][nxt]
+            for p in range(last):
+                if i - 1 <= p < i + length:
+                    continue  # Edges touching the segment itself
+                checked += 1
+                if stop_at is not None and checked % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > stop_at:
+                    return False
+                before, after = tour[p], tour[p + 1]
+                insertion_cost = distances[before][first] + distances[end][after] - distances[before][after]
+                if insertion_cost < removal_gain - IMPROVEMENT_EPSILON and (guard is None or guard.allows_move(i, length, p)):
+                    move_segment(tour, i, length, p)
+                    if guard is not None:
+                        guard.moved(i, length, p)
+                    return True
+    return False
+
+# Improve a nearest-neighbor route with 2-opt and Or-opt moves, keeping the hub as the fixed start and end.
+# Stops once no move helps, after max_iterations applied moves, or when time_budget seconds have passed, even
+# in the middle of a pass; every applied move shortens the route, so it returns the best route found so far.
+# With deadlines ({package ID: seconds since midnight or None}), depart_time and speed, moves that would make
+# an on-time stop late are rejected, so the shorter route keeps every deadline the original route met.
+def improve_route(route, locations, distances, hub_index, time_budget=1.0, max_iterations=10000, deadlines=None,
+                  depart_time=None, speed=None):
+    stops = route_to_stops(route, locations)
+    if len(stops) < 3:
+        return list(route)
+
+    # Work on the stop locations; packages at a stop always travel together
+    locations = [location for location, _ in stops]
+    location_tour = [hub_index] + locations + [hub_index]
+
+    guard = None
+    if deadlines is not None:
+        due = [None]
+        for _, package_ids in stops:
+            stop_deadlines = [deadlines[package_id] for package_id in package_ids if deadlines.get(package_id) is not None]
+            due.append(min(stop_deadlines) if stop_deadlines else None)
+        due.append(None)
+        guard = DeadlineGuard(location_tour, due, distances, depart_time, speed)
+
+    deadline = time.perf_counter() + time_budget
+    iterations = 0
+    while iterations < max_iterations and time.perf_counter() < deadline:
+        if (two_opt_pass(location_tour, distances, guard, deadline)
+                or or_opt_pass(location_tour, distances, guard=guard, stop_at=deadline)):
+            iterations += 1
+            continue
+        break
+
+    # Map the improved location order back to stops; repeated locations are matched in their original order
+    positions = {}
+    for position, location in enumerate(locations):
+        positions.setdefault(location, []).append(position)
+    improved = []
+    for location in location_tour[1:-1]:
+        improved.extend(stops[positions[location].pop(0)][1])
+    return improved
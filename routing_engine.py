@@ -0,0 +1,205 @@
+import re
+from clock import clock_seconds, format_time, parse_clock_time, travel_seconds
+from delivery_logic import get_address_index
+from distance_matrix import nearest_candidate
+
+# Address corrections on the standard WGUPS day, as (time known, package ID, new address): package 9's
+# corrected address becomes known at 10:20 AM
+STANDARD_ADDRESS_CHANGES = [(clock_seconds(10, 20), '9', "410 S. State St., Salt Lake City, UT 84111")]
+
+TRUCK_NOTE = re.compile(r"only be on truck (\d+)", re.IGNORECASE)
+DELAYED_NOTE = re.compile(r"until (\d{1,2}:\d{2}\s*[ap]m)", re.IGNORECASE)
+DELIVERED_WITH_NOTE = re.compile(r"delivered with ([\d,\s]+)", re.IGNORECASE)
+WRONG_ADDRESS_NOTE = re.compile(r"wrong address", re.IGNORECASE)
+
+# Structured form of a package's deadline and special notes, parsed once per package
+class PackageConstraints:
+    __slots__ = ("package_id", "deadline", "truck", "available_at", "delivered_with", "wrong_address")
+
+    def __init__(self, package_id, deadline=None, truck=None, available_at=0, delivered_with=(), wrong_address=False):
+        self.package_id = package_id
+        self.deadline = deadline  # Latest delivery time in seconds since midnight, None for EOD
+        self.truck = truck  # Truck ID the package is restricted to, if any
+        self.available_at = available_at  # Earliest time the package can leave the hub
+        self.delivered_with = delivered_with  # IDs of every package in its co-delivery group (including itself)
+        self.wrong_address = wrong_address  # Listed address is wrong and no correction is coming
+
+# Parse one package record's deadline and notes into constraints. corrected_at is when the package's corrected
+# address becomes known, None if no correction is coming.
+def parse_constraints(package, corrected_at=None):
+    notes = package.notes or ""
+    constraints = PackageConstraints(package.package_id, parse_clock_time(package.deadline))
+
+    match = TRUCK_NOTE.search(notes)
+    if match:
+        constraints.truck = int(match.group(1))
+
+    match = DELAYED_NOTE.search(notes)
+    if match:
+        constraints.available_at = parse_clock_time(match.group(1))
+
+    if WRONG_ADDRESS_NOTE.search(notes):
+        # The package cannot be routed until its address has been corrected
+        if corrected_at is None:
+            constraints.wrong_address = True
+        else:
+            constraints.available_at = max(constraints.available_at, corrected_at)
+
+    match = DELIVERED_WITH_NOTE.search(notes)
+    if match:
+        constraints.delivered_with = tuple(part.strip() for part in match.group(1).split(",") if part.strip())
+    return constraints
+
+# Parse constraints for every package in the table and close the "Must be delivered with" relation into groups.
+# address_changes are the day's (time known, package ID, new address) corrections; a "Wrong address listed"
+# package becomes available at its earliest correction.
+def load_constraints(packages, address_changes=()):
+    corrected_at = {}
+    for when, package_id, _ in address_changes:
+        package_id = str(package_id)
+        if package_id not in corrected_at or when < corrected_at[package_id]:
+            corrected_at[package_id] = when
+    constraints = {package.package_id: parse_constraints(package, corrected_at.get(package.package_id))
+                   for package in packages}
+
+    # Union-find over the co-delivery notes so indirect links end up in the same group
+    parent = {}
+
+    def find(package_id):
+        parent.setdefault(package_id, package_id)
+        while parent[package_id] != package_id:
+            parent[package_id] = parent[parent[package_id]]
+            package_id = parent[package_id]
+        return package_id
+
+    for package_id, constraint in constraints.items():
+        for other in constraint.delivered_with:
+            root, other_root = find(package_id), find(other)
+            if root != other_root:
+                parent[other_root] = root
+
+    groups = {}
+    for package_id in list(parent):
+        groups.setdefault(find(package_id), []).append(package_id)
+    for members in groups.values():
+        group = tuple(sorted(members, key=lambda package_id: (len(package_id), package_id)))
+        for package_id in group:
+            if package_id in constraints:
+                constraints[package_id].delivered_with = group
+    return constraints
+
+# Routes chosen for each truck, plus the packages that could not be delivered as constrained and why
+class RoutePlan:
+    __slots__ = ("routes", "infeasible")
+
+    def __init__(self):
+        self.routes = {}  # truck ID -> ordered package IDs
+        self.infeasible = {}  # package ID -> reason
+
+    def flag(self, package_id, reason):
+        self.infeasible.setdefault(package_id, reason)
+
+# Order one truck's packages: nearest-neighbor within deadline tiers, earliest deadline tier first,
+# then check each stop's arrival time against its packages' deadlines.
+# items are (package ID, location index, deadline) tuples; returns the route and {package ID: reason} flags.
+def build_route(items, distances, hub_index, depart_time, speed):
+    stops = {}
+    stop_deadline = {}
+    deadlines = {}
+    for package_id, location, deadline in items:
+        stops.setdefault(location, []).append(package_id)
+        deadlines[package_id] = deadline
+        if deadline is not None and (stop_deadline.get(location) is None or deadline < stop_deadline[location]):
+            stop_deadline[location] = deadline
+
+    tiers = {}
+    for location in stops:
+        tiers.setdefault(stop_deadline.get(location), []).append(location)
+    tier_order = sorted(tiers, key=lambda deadline: (deadline is None, deadline))
+
+    route = []
+    flags = {}
+    current = hub_index
+    clock = depart_time
+    for tier in tier_order:
+        remaining = dict.fromkeys(tiers[tier])
+        while remaining:
+            row = distances[current]
+            nearest = nearest_candidate(distances, current, remaining)
+            del remaining[nearest]
+            if row[nearest] == float('inf'):
+                for package_id in stops[nearest]:
+                    flags[package_id] = "no known distance to its address"
+                continue
+
+            clock += travel_seconds(row[nearest], speed)
+            current = nearest
+            for package_id in stops[nearest]:
+                deadline = deadlines[package_id]
+                if deadline is not None and clock > deadline:
+                    flags[package_id] = f"arrives at {format_time(clock)} after its {format_time(deadline)} deadline"
+                route.append(package_id)
+    return route, flags
+
+# Map each loaded package ID to the ID of the truck carrying it
+def truck_assignments(trucks):
+    truck_of = {}
+    for truck in trucks:
+        for package_id in truck.packages:
+            truck_of[str(package_id)] = truck.id
+    return truck_of
+
+# Check a truck's load against the constraints. Returns the (package ID, location, deadline) items it may
+# carry; packages it may not carry (wrong truck, not yet at the hub, unknown address) are flagged and dropped.
+def routable_items(truck, packages, constraints, truck_of, plan):
+    items = []
+    for package_id in map(str, truck.packages):
+        package = packages.lookup(package_id)
+        constraint = constraints.get(package_id)
+        if package is None or constraint is None:
+            plan.flag(package_id, "not in the package table")
+            continue
+        if package.location is None:
+            plan.flag(package_id, f"address '{package.address}' not found")
+            continue
+        if constraint.wrong_address:
+            plan.flag(package_id, "listed with a wrong address and no correction")
+            continue
+        if constraint.truck is not None and constraint.truck != truck.id:
+            plan.flag(package_id, f"can only be on truck {constraint.truck}, loaded on truck {truck.id}")
+            continue
+        if constraint.available_at > truck.depart_time:
+            plan.flag(package_id, f"not available until {format_time(constraint.available_at)}, truck {truck.id} leaves at {format_time(truck.depart_time)}")
+            continue
+        split = [other for other in constraint.delivered_with if truck_of.get(other) != truck.id]
+        if split:
+            plan.flag(package_id, f"must be delivered with {', '.join(split)}, which are not on truck {truck.id}")
+        items.append((package_id, package.location, constraint.deadline))
+    return items
+
+# Record each routed package's truck on its record and flag packages nobody loaded
+def merge_plan(plan, packages, truck_of):
+    for truck_id, route in plan.routes.items():
+        for package_id in route:
+            packages.lookup(package_id).truck = truck_id
+    for package in packages:
+        if package.package_id not in truck_of:
+            plan.flag(package.package_id, "not loaded on any truck")
+
+# Plan deadline-aware routes for loaded trucks, enforcing truck restrictions, delayed availability and
+# co-delivery groups. Packages a truck may not carry (wrong truck, not yet at the hub) are left off its route.
+def plan_routes(trucks, packages, distances, constraints=None):
+    if constraints is None:
+        constraints = load_constraints(packages)
+    plan = RoutePlan()
+    truck_of = truck_assignments(trucks)
+
+    for truck in trucks:
+        items = routable_items(truck, packages, constraints, truck_of, plan)
+        route, flags = build_route(items, distances, get_address_index(truck.hub), truck.depart_time, truck.speed)
+        plan.routes[truck.id] = route
+        for package_id, reason in flags.items():
+            plan.flag(package_id, reason)
+
+    merge_plan(plan, packages, truck_of)
+    return plan
@@ -0,0 +1,133 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import delivery_logic
+from batch import load_shared_data, run_day
+from package_columns import PackageColumns
+from truck import HUB_ADDRESS
+
+# Metrics summed over scenarios, per depot and overall
+TOTAL_FIELDS = ("scenarios", "packages", "delivered", "on_time", "late", "undelivered", "mileage")
+
+# Simulate one (depot, day) scenario over the process's shared address table and distance matrix. scenario is
+# (name, depot address, package file, fleet file, drivers, improve); returns its metrics as a plain dict so
+# only a few numbers travel back to the parent.
+def run_scenario(scenario):
+    name, depot, package_file, fleet_file, drivers, improve = scenario
+    start = time.perf_counter()
+    day = run_day(package_file, fleet_file, drivers, improve=improve, hub=depot)
+    on_time, delivered, _ = PackageColumns(day.packages).on_time_rate()
+    return {
+        "scenario": name, "depot": depot, "packages": day.report.loaded, "delivered": delivered,
+        "on_time": on_time, "late": delivered - on_time, "undelivered": day.report.loaded - delivered,
+        "mileage": round(sum(truck.mileage for truck in day.trucks), 2),
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+# Sum scenario metrics per depot and overall: {depot: totals}, totals
+def aggregate(results):
+    by_depot = {}
+    overall = dict.fromkeys(TOTAL_FIELDS, 0)
+    for result in results:
+        depot = by_depot.setdefault(result["depot"], dict.fromkeys(TOTAL_FIELDS, 0))
+        for totals in (depot, overall):
+            totals["scenarios"] += 1
+            for field in TOTAL_FIELDS[1:]:
+                totals[field] += result[field]
+    return by_depot, overall
+
+def on_time_rate(totals):
+    return totals["on_time"] / totals["delivered"] if totals["delivered"] else 0.0
+
+# Scenarios from a CSV of Name, Depot, Packages, Fleet; an empty depot or fleet falls back to the defaults
+def load_scenarios(filename, default_depot, default_fleet, drivers, improve):
+    scenarios = []
+    base = os.path.dirname(filename)
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Skip header row
+        for row in reader:
+            if not row:
+                continue
+            row += [""] * (4 - len(row))
+            depot = row[1].strip() or default_depot
+            package_file = os.path.join(base, row[2].strip())
+            fleet_file = os.path.join(base, row[3].strip()) if row[3].strip() else default_fleet
+            scenarios.append((row[0].strip(), depot, package_file, fleet_file, drivers, improve))
+    return scenarios
+
+# Run every scenario, across a process pool when workers > 1. Each worker loads the address table once and
+# memory-maps the distance matrix's binary cache (or its shortest-path closure), so a scenario only reads its
+# own manifest. Yields results in scenario order.
+def run_scenarios(scenarios, address_file, distance_file, workers=1, closure=False):
+    if workers > 1 and len(scenarios) > 1:
+        # Build the distance cache up front so workers only ever map it
+        delivery_logic.load_distance_data(distance_file, closure=closure)
+        # Several scenarios per task keep the pool's pickling round trips off the critical path
+        chunksize = max(1, len(scenarios) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_shared_data,
+                                 initargs=(address_file, distance_file, closure)) as executor:
+            yield from executor.map(run_scenario, scenarios, chunksize=chunksize)
+    else:
+        load_shared_data(address_file, distance_file, closure)
+        for scenario in scenarios:
+            yield run_scenario(scenario)
+
+def print_report(by_depot, overall, elapsed):
+    print("{:<32} {:>9} {:>9} {:>9} {:>8} {:>10}".format("Depot", "Scenarios", "Packages", "On time", "Late", "Mileage"))
+    print("-" * 82)
+    for depot, totals in sorted(by_depot.items()):
+        print("{:<32} {:>9} {:>9} {:>9.1%} {:>8} {:>10.1f}".format(
+            depot[:32], totals["scenarios"], totals["packages"], on_time_rate(totals), totals["late"], totals["mileage"]))
+    print("-" * 82)
+    print("{:<32} {:>9} {:>9} {:>9.1%} {:>8} {:>10.1f}".format(
+        "All depots", overall["scenarios"], overall["packages"], on_time_rate(overall), overall["late"], overall["mileage"]))
+    rate = overall["scenarios"] / elapsed if elapsed else 0.0
+    print(f"{overall['scenarios']} scenarios in {elapsed:.2f} s ({rate:.2f} scenarios/s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many (depot, day) scenarios and aggregate mileage and on-time rates")
+    parser.add_argument("scenarios", help="CSV of scenarios: Name, Depot, Packages, Fleet (paths relative to the CSV)")
+    parser.add_argument("--addresses", default="CSV/address.csv", help="address table shared by every depot")
+    parser.add_argument("--distances", default="CSV/distance.csv", help="distance matrix shared by every depot")
+    parser.add_argument("--depot", default=HUB_ADDRESS, help="hub address for scenarios that name none")
+    parser.add_argument("--fleet", default="CSV/fleet.csv", help="fleet for scenarios that name none")
+    parser.add_argument("--drivers", type=int, help="drivers per depot (default: one per truck)")
+    parser.add_argument("--improve", action="store_true", help="run the 2-opt / Or-opt pass on each route")
+    parser.add_argument("--closure", action="store_true",
+                        help="fill distances the CSV leaves out with shortest paths (computed once, then cached)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="process pool size")
+    parser.add_argument("--output", help="JSON Lines file for the per-scenario metrics")
+    args = parser.parse_args(argv)
+
+    scenarios = load_scenarios(args.scenarios, args.depot, args.fleet, args.drivers, args.improve)
+    if not scenarios:
+        parser.error(f"no scenarios in {args.scenarios}")
+
+    # Every depot must be a known address; checking here beats a warning per scenario from every worker
+    delivery_logic.load_address_data(args.addresses)
+    unknown = sorted({depot for _, depot, *_ in scenarios if delivery_logic.resolve_address(depot) is None})
+    if unknown:
+        parser.error(f"depot addresses not in {args.addresses}: {', '.join(unknown)}")
+
+    results = []
+    start = time.perf_counter()
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for result in run_scenarios(scenarios, args.addresses, args.distances, args.workers, args.closure):
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    by_depot, overall = aggregate(results)
+    print_report(by_depot, overall, elapsed)
+
+if __name__ == "__main__":
+    main()
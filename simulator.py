@@ -0,0 +1,207 @@
+import heapq
+from collections import deque
+from itertools import count
+import instrumentation
+from clock import format_time
+from delivery_logic import get_address_index
+
+# Event kinds, processed in time order (ties keep scheduling order)
+DEPART = "depart"
+ARRIVE = "arrive"
+RETURN = "return"
+ADDRESS_CHANGE = "address change"
+
+# Discrete-event simulation of a whole delivery day: every truck runs on one timeline driven by a priority
+# queue, trucks wait at the hub for a free driver, and address corrections re-route the affected truck when they arrive.
+# Trucks travel stop by stop: consecutive route packages for the same location are one leg and one arrival event.
+class DeliverySimulator:
+    def __init__(self, trucks, routes, packages, distances, drivers=None):
+        self.trucks = {truck.id: truck for truck in trucks}
+        # A route can only deliver what its truck carries; anything else is dropped before the day starts
+        self.routes = {}
+        for truck in trucks:
+            self.routes[truck.id] = []
+            for package_id in routes.get(truck.id, ()):
+                if truck.has_package(package_id):
+                    self.routes[truck.id].append(package_id)
+                else:
+                    instrumentation.warn(f"Package {package_id} not found on Truck {truck.id}.")
+        self.packages = packages
+        self.distances = distances
+        self.event_log = packages.event_log  # RunStore to record truck progress and re-routes in, if any
+        self.hubs = {truck.id: get_address_index(truck.hub) for truck in trucks}  # Hub index per truck
+
+        # Location each routed package is driven to; only an address change (via _reroute) moves it
+        self.stop_locations = {}
+        for route in self.routes.values():
+            for package_id in route:
+                package = packages.lookup(str(package_id))
+                self.stop_locations[package_id] = package.location if package else None
+
+        self.truck_of = {package_id: truck_id for truck_id, route in self.routes.items() for package_id in route}
+        self.position = {truck_id: 0 for truck_id in self.trucks}  # Next route index per truck
+        self.in_flight = {truck_id: None for truck_id in self.trucks}  # Packages of the stop each truck is driving to
+        self.location = dict(self.hubs)  # Last stop reached per truck
+        self.legs = {truck_id: [] for truck_id in self.trucks}  # (package IDs, location, departure, delivery) per truck
+        self.free_drivers = len(trucks) if drivers is None else drivers
+        self.waiting = deque()  # Trucks ready to leave but without a driver
+        self.events = []
+        self.sequence = count()
+        self.now = None
+
+        for truck in sorted(trucks, key=lambda truck: truck.depart_time):
+            if self.routes[truck.id]:  # Trucks with no packages never leave the hub
+                self.schedule(truck.depart_time, DEPART, truck.id)
+
+    def schedule(self, when, kind, payload):
+        heapq.heappush(self.events, (when, next(self.sequence), kind, payload))
+
+    # Correct a package's address at a given time of day; the carrying truck's remaining route is repaired then
+    def schedule_address_change(self, when, package_id, new_address):
+        self.schedule(when, ADDRESS_CHANGE, (str(package_id), new_address))
+
+    # Apply an address correction that arrives at time when: simulate up to that moment, repair only the
+    # affected truck's remaining route, and leave the rest of the day to be simulated from there on.
+    # Returns the ID of the re-routed truck, or None if the package was already delivered or under way.
+    def change_address(self, when, package_id, new_address):
+        if self.now is not None and when < self.now:
+            raise ValueError(f"Simulation is already at {format_time(self.now)}, cannot apply an address change at {format_time(when)}")
+        self.run(until=when)
+        self.now = when
+        return self._change_address(str(package_id), new_address)
+
+    # Process events in time order, stopping after the last event at or before until (None runs the whole day)
+    def run(self, until=None):
+        events = self.events
+        counters = instrumentation.counters if instrumentation.enabled else None
+        while events and (until is None or events[0][0] <= until):
+            when, _, kind, payload = heapq.heappop(events)
+            self.now = when
+            if counters is not None:
+                counters["simulator.events." + kind] += 1
+            if kind == ARRIVE:
+                self._arrive(*payload)
+            elif kind == DEPART:
+                self._depart(payload)
+            elif kind == RETURN:
+                self._return(payload)
+            elif kind == ADDRESS_CHANGE:
+                self._change_address(*payload)
+        return self
+
+    def _depart(self, truck_id):
+        if self.free_drivers == 0:
+            self.waiting.append(truck_id)
+            return
+        self.free_drivers -= 1
+        truck = self.trucks[truck_id]
+        if self.now > truck.time:  # Waited at the hub for a driver
+            truck.time = self.now
+        self._start_leg(truck)
+
+    # Send a truck toward its next stop, or back to the hub once its route is done
+    def _start_leg(self, truck):
+        route = self.routes[truck.id]
+        position = self.position[truck.id]
+        stop_locations = self.stop_locations
+        while position < len(route):
+            package_id = route[position]
+            destination = stop_locations.get(package_id)
+            if destination is not None:
+                break
+            instrumentation.warn(f"Unable to calculate distance for Package {package_id}")
+            position += 1
+        self.position[truck.id] = position
+
+        if position == len(route):
+            truck.return_to_hub(self.distances[self.location[truck.id]][self.hubs[truck.id]])
+            self.schedule(truck.time, RETURN, truck.id)
+            return
+
+        # Every following package for the same location is dropped at the same stop
+        end = position + 1
+        while end < len(route) and stop_locations.get(route[end]) == destination:
+            end += 1
+        stop = route[position:end]
+
+        departure = truck.time
+        self.in_flight[truck.id] = stop
+        self.packages.update_stop(stop, status="En route", departure_time=departure)
+        distance = self.distances[self.location[truck.id]][destination]
+        delivery_time = truck.deliver_stop(stop, distance, self.packages.lookup(str(package_id)).address)
+        self.legs[truck.id].append((stop, destination, departure, delivery_time))
+        self.schedule(delivery_time, ARRIVE, (truck.id, stop))
+
+    def _arrive(self, truck_id, stop):
+        self.packages.update_stop(stop, status="Delivered", delivery_time=self.now)
+        if self.event_log is not None:
+            self.event_log.truck_moved(self.trucks[truck_id])
+        self.location[truck_id] = self.stop_locations[stop[0]]
+        self.in_flight[truck_id] = None
+        self.position[truck_id] += len(stop)
+        self._start_leg(self.trucks[truck_id])
+
+    # A truck back at the hub frees its driver for the next waiting truck
+    def _return(self, truck_id):
+        if self.event_log is not None:
+            self.event_log.truck_moved(self.trucks[truck_id])
+        self.free_drivers += 1
+        if self.waiting:
+            self._depart(self.waiting.popleft())
+
+    # A correction for a package that is delivered or already being driven to its old address comes too late:
+    # the record keeps the address the truck actually went to
+    def _change_address(self, package_id, new_address):
+        if self.packages.lookup(package_id) is None:
+            instrumentation.warn(f"Package {package_id} not found")
+            return None
+        if not self._can_move(package_id):
+            instrumentation.warn(f"Address correction for package {package_id} refused: it is already delivered or under way")
+            return None
+        self.packages.update_package_details(package_id, new_address=new_address)
+        return self._reroute(package_id, self.packages.lookup(package_id).location)
+
+    # Index of the first package in a truck's route that has not left yet
+    def _first_movable(self, truck_id):
+        in_flight = self.in_flight[truck_id]
+        return self.position[truck_id] + (len(in_flight) if in_flight is not None else 0)
+
+    # Whether a package has not left yet; packages on no route have not left either
+    def _can_move(self, package_id):
+        truck_id = self.truck_of.get(package_id)
+        return truck_id is None or package_id in self.routes[truck_id][self._first_movable(truck_id):]
+
+    # Move a not-yet-started package to its cheapest position in its truck's remaining route
+    def _reroute(self, package_id, location):
+        truck_id = self.truck_of.get(package_id)
+        if truck_id is None or location is None or not self._can_move(package_id):
+            return None
+        route = self.routes[truck_id]
+        in_flight = self.in_flight[truck_id]
+        first = self._first_movable(truck_id)
+
+        route.remove(package_id)
+        self.stop_locations[package_id] = location
+
+        # Cheapest insertion between consecutive remaining stops (the truck's next point first, the hub last)
+        previous = self.stop_locations[in_flight[0]] if in_flight is not None else self.location[truck_id]
+        points = [previous] + [self.stop_locations[other] for other in route[first:]] + [self.hubs[truck_id]]
+        distances = self.distances
+        best = min(range(len(points) - 1), key=lambda k: (
+            distances[points[k]][location] + distances[location][points[k + 1]] - distances[points[k]][points[k + 1]]))
+        route.insert(first + best, package_id)
+        if self.event_log is not None:
+            self.event_log.route_changed(truck_id, route)
+        return truck_id
+
+# Run a whole day at once; returns the finished simulator. With a RunStore, the starting state is snapshotted
+# and every change during the day is logged to it.
+def simulate_day(trucks, routes, packages, distances, drivers=None, address_changes=(), store=None):
+    simulator = DeliverySimulator(trucks, routes, packages, distances, drivers)
+    if store is not None:
+        # The simulator re-routes its own copy of the routes, so that is the copy snapshots must write
+        store.attach(packages, trucks, simulator.routes)
+        simulator.event_log = store
+    for when, package_id, new_address in address_changes:
+        simulator.schedule_address_change(when, package_id, new_address)
+    return simulator.run()
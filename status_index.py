@@ -0,0 +1,108 @@
+from bisect import bisect_right
+from clock import format_am_pm, to_seconds
+
+AT_HUB = "At hub"
+EN_ROUTE = "En route"
+DELIVERED = "Delivered"
+
+# Sorted departure and delivery times for one set of packages
+class _TimeIndex:
+    __slots__ = ("departure_times", "departure_order", "delivery_times", "delivery_order", "total")
+
+    def __init__(self, entries):
+        # entries are (package ID, departure, delivery) with seconds-since-midnight or None times
+        departures = sorted((departure, package_id) for package_id, departure, _ in entries if departure is not None)
+        deliveries = sorted((delivery, package_id) for package_id, _, delivery in entries if delivery is not None)
+        self.departure_times = [when for when, _ in departures]
+        self.departure_order = [package_id for _, package_id in departures]
+        self.delivery_times = [when for when, _ in deliveries]
+        self.delivery_order = [package_id for _, package_id in deliveries]
+        self.total = len(entries)
+
+    # (departed, delivered) counts at a time of day
+    def positions(self, at):
+        return bisect_right(self.departure_times, at), bisect_right(self.delivery_times, at)
+
+# Read-only status of every package at one time of day
+class StatusSnapshot:
+    __slots__ = ("index", "at", "departed", "delivered")
+
+    def __init__(self, index, at, departed, delivered):
+        self.index = index
+        self.at = at
+        self.departed = departed
+        self.delivered = delivered
+
+    # Package counts per state
+    @property
+    def counts(self):
+        return {
+            AT_HUB: self.index.all.total - self.departed,
+            EN_ROUTE: self.departed - self.delivered,
+            DELIVERED: self.delivered,
+        }
+
+    # State of one package at this snapshot's time, or None if it is not in the index
+    def state(self, package_id):
+        return self.index.state(package_id, self.at)
+
+    # Package IDs delivered by this time, in delivery order
+    def delivered_ids(self):
+        return self.index.all.delivery_order[:self.delivered]
+
+    # Package IDs that have left the hub but are not yet delivered
+    def en_route_ids(self):
+        times = self.index.times
+        return [package_id for package_id in self.index.all.departure_order[:self.departed]
+                if times[package_id][1] is None or times[package_id][1] > self.at]
+
+# Sorted index of departure and delivery times built from a simulated package table. Answers "status of
+# everything at time T" with two bisects instead of scanning and formatting every package. The index is a
+# snapshot of the table when it was built; rebuild it after the table changes.
+class StatusIndex:
+    def __init__(self, packages):
+        entries = [
+            (package.package_id, package.departure_time, package.delivery_time, package.truck)
+            for package in packages
+        ]
+        self.times = {package_id: (departure, delivery) for package_id, departure, delivery, _ in entries}
+        self.all = _TimeIndex([entry[:3] for entry in entries])
+
+        by_truck = {}
+        for entry in entries:
+            by_truck.setdefault(entry[3], []).append(entry[:3])
+        self.trucks = {truck_id: _TimeIndex(truck_entries) for truck_id, truck_entries in by_truck.items()}
+
+    # Snapshot of every package at a time of day (seconds since midnight, or a datetime/timedelta/text time)
+    def snapshot(self, at):
+        at = to_seconds(at)
+        return StatusSnapshot(self, at, *self.all.positions(at))
+
+    # Package counts per state for one truck's packages
+    def truck_counts(self, truck_id, at):
+        index = self.trucks.get(truck_id)
+        if index is None:
+            return {AT_HUB: 0, EN_ROUTE: 0, DELIVERED: 0}
+        departed, delivered = index.positions(to_seconds(at))
+        return {AT_HUB: index.total - departed, EN_ROUTE: departed - delivered, DELIVERED: delivered}
+
+    # State of a single package at a time of day, or None if the package is unknown
+    def state(self, package_id, at):
+        times = self.times.get(str(package_id))
+        if times is None:
+            return None
+        at = to_seconds(at)
+        departure, delivery = times
+        if delivery is not None and at >= delivery:
+            return DELIVERED
+        if departure is not None and at >= departure:
+            return EN_ROUTE
+        return AT_HUB
+
+# Status line for one package at a time of day, as HashTable.check_package_status and lookup print it
+def describe_status(package_id, departure_time, delivery_time, check_time):
+    if delivery_time is not None and check_time >= delivery_time:
+        return f"Package {package_id} was delivered at {format_am_pm(delivery_time)}"
+    if departure_time is not None and check_time >= departure_time:
+        return f"Package {package_id} is en route as of {format_am_pm(check_time)}"
+    return f"Package {package_id} is at the hub as of {format_am_pm(check_time)}"
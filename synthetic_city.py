@@ -0,0 +1,123 @@
+import argparse
+import csv
+import math
+import os
+import random
+
+HUB_NAME = "Western Governors University"
+HUB_ADDRESS = "4001 South 700 East"
+DEADLINES = (("9:00 AM", 0.05), ("10:30 AM", 0.25))  # Remaining packages are EOD
+DELAYED_NOTE = "Delayed on flight---will not arrive to depot until 9:05 am"
+
+# Generate a synthetic service area in the same CSV formats as CSV/: address.csv, distance.csv (lower
+# triangle), package.csv, plus fleet.csv for the trucks. Location 0 is the hub. Distances are straight-line
+# miles between random points, scaled by a road factor, so the matrix is (up to rounding) metric.
+def generate_city(directory, addresses, packages, trucks, seed=1, road_factor=1.3):
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    streets = write_area(directory, addresses, rng, road_factor)
+    write_packages(os.path.join(directory, "package.csv"), streets, packages, trucks, rng)
+    write_fleet(os.path.join(directory, "fleet.csv"), packages, trucks)
+    return directory
+
+# Generate weeks of history for several depots sharing one service area: address.csv and distance.csv once,
+# one package manifest per (day, depot), a fleet.csv every depot runs, and scenarios.csv listing the runs
+# (Name, Depot, Packages, Fleet). Depot 1 is the original hub; the others are random locations in the area.
+def generate_history(directory, addresses, depots, days, packages, trucks, seed=1, road_factor=1.3):
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    streets = write_area(directory, addresses, rng, road_factor)
+    fleet_file = os.path.join(directory, "fleet.csv")
+    write_fleet(fleet_file, packages, trucks)
+    hubs = [HUB_ADDRESS] + [streets[location] for location in rng.sample(range(1, addresses), depots - 1)]
+
+    with open(os.path.join(directory, "scenarios.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Depot", "Packages", "Fleet"])
+        for day in range(1, days + 1):
+            for depot, hub in enumerate(hubs, start=1):
+                name = f"day{day:03d}-depot{depot}"
+                package_file = os.path.join(directory, f"{name}.csv")
+                write_packages(package_file, streets, packages, trucks, rng)
+                writer.writerow([name, hub, package_file, fleet_file])
+    return directory
+
+# Write address.csv and distance.csv for random points in a square area; returns the street address of each location
+def write_area(directory, addresses, rng, road_factor):
+    size = max(8.0, math.sqrt(addresses) * 0.5)  # Side of the square area in miles
+    points = [(size / 2, size / 2)] + [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(addresses - 1)]
+
+    # One unique street address per location; the numbers keep them distinct after normalization
+    streets = [HUB_ADDRESS] + [f"{100 + i} {rng.choice(('North', 'South'))} {(i % 97) * 100 + 100} {rng.choice(('East', 'West'))}"
+                               for i in range(1, addresses)]
+    with open(os.path.join(directory, "address.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["ID", "Name", "Address"])
+        writer.writerow([0, HUB_NAME, HUB_ADDRESS])
+        for i in range(1, len(streets)):
+            writer.writerow([i, f"Location {i}", f" {streets[i]}"])
+
+    with open(os.path.join(directory, "distance.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        for i, a in enumerate(points):
+            row = [f"{math.dist(a, points[j]) * road_factor:.1f}" for j in range(i)] + ["0.0"]
+            writer.writerow(row + [""] * (addresses - i - 1))
+    return streets
+
+# Write one day's package manifest to random non-hub locations, with deadlines and special notes
+def write_packages(filename, streets, packages, trucks, rng):
+    deadlines = [rng.random() for _ in range(packages)]
+    with open(filename, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Package ID", "Address", "City", "State", "Zip", "Delivery Deadline", "Weight KILO", "Special Notes"])
+        for package_id in range(1, packages + 1):
+            location = rng.randrange(1, len(streets))
+            draw = deadlines[package_id - 1]
+            deadline = "EOD"
+            for text, share in DEADLINES:
+                if draw < share:
+                    deadline = text
+                    break
+                draw -= share
+
+            note = ""
+            roll = rng.random()
+            if roll < 0.03:
+                note = f"Can only be on truck {rng.randrange(1, trucks + 1)}"
+            elif roll < 0.08 and deadline != "9:00 AM":
+                note = DELAYED_NOTE
+            elif roll < 0.09 and deadline == "EOD":
+                note = "Wrong address listed"
+            elif roll < 0.11 and package_id > 2:
+                others = rng.sample(range(1, package_id), 2)
+                note = f"Must be delivered with {others[0]}, {others[1]}"
+            writer.writerow([package_id, streets[location], "Salt Lake City", "UT", f"84{location % 1000:03d}",
+                             deadline, rng.randint(1, 90), note])
+
+# Write fleet.csv: trucks leave in waves so delayed packages have somewhere to go
+def write_fleet(filename, packages, trucks):
+    capacity = math.ceil(packages / trucks * 1.2)
+    departures = ["8:00 AM", "9:05 AM", "10:30 AM"]
+    with open(filename, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Truck ID", "Capacity", "Speed", "Departure"])
+        for truck_id in range(1, trucks + 1):
+            writer.writerow([truck_id, capacity, 18, departures[(truck_id - 1) % len(departures)]])
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic WGUPS service area")
+    parser.add_argument("directory")
+    parser.add_argument("--addresses", type=int, default=500)
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--trucks", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--depots", type=int, default=1, help="with --days: depots sharing the area")
+    parser.add_argument("--days", type=int, help="write a scenario history (one manifest per day and depot) instead")
+    args = parser.parse_args()
+    if args.days:
+        generate_history(args.directory, args.addresses, args.depots, args.days, args.packages, args.trucks, args.seed)
+    else:
+        generate_city(args.directory, args.addresses, args.packages, args.trucks, args.seed)
+
+if __name__ == "__main__":
+    main()
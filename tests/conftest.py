@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The program's modules live at the top of the repository and load their CSVs by relative path
+PROGRAM_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROGRAM_DIRECTORY)
@@ -0,0 +1,28 @@
+import os
+import pytest
+import delivery_logic
+from address_index import AddressIndex
+from conftest import PROGRAM_DIRECTORY
+
+@pytest.fixture(scope="module")
+def index():
+    delivery_logic.load_address_data(os.path.join(PROGRAM_DIRECTORY, "CSV", "address.csv"))
+    return delivery_logic.address_index
+
+def test_abbreviations_and_units_resolve(index):
+    assert index.resolve("4580 S 2300 E") == 21
+    assert index.resolve("4580 South 2300 East, Suite 4, Holladay, UT 84117") == 21
+
+def test_misspelled_street_name_resolves(index):
+    assert index.resolve("5025 Stat St") == 22
+    assert index.resolve("Holiday Cty Office") == 21
+
+def test_mismatched_direction_not_resolved(index):
+    assert index.resolve("4580 S 2300 W") is None
+    assert index.resolve("4580 N 2300 E") is None
+
+def test_mismatched_street_type_not_resolved():
+    index = AddressIndex()
+    index.add(1, "1060 Dalton Ave S")
+    assert index.resolve("1060 Dalton Ave South") == 1
+    assert index.resolve("1060 Dalton Street S") is None
@@ -0,0 +1,49 @@
+import math
+from distance_matrix import CACHE_SUFFIX, NEIGHBOR_COUNT, load_distance_matrix, parse_distance_csv
+
+# Lower-triangle CSV, as CSV/distance.csv is laid out, of points on a line at the given positions
+def write_line_city(path, positions):
+    with open(path, 'w', newline='') as file:
+        for i, a in enumerate(positions):
+            file.write(",".join(str(abs(a - b)) for b in positions[:i + 1]) + "," * (len(positions) - i - 1) + "\n")
+
+def test_neighbor_lists_stored_in_cache(tmp_path):
+    filename = str(tmp_path / "distance.csv")
+    write_line_city(filename, [float(i * i % 37) for i in range(40)])
+    expected = [list(row) for row in parse_distance_csv(filename).neighbors()]
+
+    built = load_distance_matrix(filename)  # Cache miss: builds the matrix and writes the cache
+    mapped = load_distance_matrix(filename)  # Cache hit
+    assert (tmp_path / ("distance.csv" + CACHE_SUFFIX)).exists()
+    assert mapped._neighbor_data is not None  # Read from the file, not recomputed
+    assert [list(row) for row in built.neighbors()] == expected
+    assert [list(row) for row in mapped.neighbors()] == expected
+    assert all(len(row) == NEIGHBOR_COUNT for row in expected)
+
+def test_small_matrix_keeps_every_location(tmp_path):
+    filename = str(tmp_path / "distance.csv")
+    write_line_city(filename, [0.0, 5.0, 1.0])
+    assert [list(row) for row in load_distance_matrix(filename).neighbors()] == [[0, 2, 1], [1, 2, 0], [2, 0, 1]]
+    assert load_distance_matrix(filename)[0][1] == 5.0
+    assert not math.isinf(load_distance_matrix(filename)[2][1])
+
+def test_closure_fills_missing_pairs_with_shortest_paths(tmp_path):
+    # 0-1-2-3 is a chain with the long way round also given (0-3); 4 is connected to nothing
+    filename = str(tmp_path / "distance.csv")
+    with open(filename, 'w', newline='') as file:
+        file.write("0,,,,\n")
+        file.write("2,0,,,\n")
+        file.write(",3,0,,\n")
+        file.write("9,,1,0,\n")
+        file.write(",,,,0\n")
+    closed = load_distance_matrix(filename, closure=True)
+    expected = [
+        [0, 2, 5, 6, math.inf],
+        [2, 0, 3, 4, math.inf],
+        [5, 3, 0, 1, math.inf],
+        [6, 4, 1, 0, math.inf],
+        [math.inf, math.inf, math.inf, math.inf, 0],
+    ]
+    assert [list(closed[i]) for i in range(5)] == expected  # 0-3 tightened from 9 to 6, gaps filled, 4 stays apart
+    assert list(load_distance_matrix(filename)[0]) == [0, 2, math.inf, 9, math.inf]  # The plain matrix is untouched
+    assert [list(load_distance_matrix(filename, closure=True)[i]) for i in range(5)] == expected  # From the cache
@@ -0,0 +1,38 @@
+import os
+import pytest
+import delivery_logic
+from conftest import PROGRAM_DIRECTORY
+from hash_table import HashTable
+
+HEADER = "Package ID,Address,City,State,Zip,Delivery Deadline,Weight KILO,Special Notes\n"
+
+@pytest.fixture(scope="module", autouse=True)
+def addresses():
+    delivery_logic.load_address_data(os.path.join(PROGRAM_DIRECTORY, "CSV", "address.csv"))
+
+def load(tmp_path, rows):
+    filename = tmp_path / "package.csv"
+    filename.write_text(HEADER + "".join(row + "\n" for row in rows), encoding="utf-8")
+    packages = HashTable()
+    return packages, packages.load_package_data(str(filename))
+
+def test_valid_deadlines_load(tmp_path):
+    packages, report = load(tmp_path, [
+        "1,195 W Oakland Ave,Salt Lake City,UT,84115,10:30 AM,21,",
+        "2,2530 S 500 E,Salt Lake City,UT,84106,EOD,44,",
+        "3,233 Canyon Rd,Salt Lake City,UT,84103,9:00am,2,",
+        "4,380 W 2880 S,Salt Lake City,UT,84115,12:00 PM,4,",
+    ])
+    assert report.loaded == 4
+    assert report.rejected == []
+    assert packages.lookup("3").deadline == "9:00am"
+
+@pytest.mark.parametrize("deadline", ["13:30 PM", "10:75 AM", "0:30 AM", "10:30", "noon", ""])
+def test_out_of_range_deadline_rejected(tmp_path, deadline):
+    packages, report = load(tmp_path, [
+        "1,195 W Oakland Ave,Salt Lake City,UT,84115,10:30 AM,21,",
+        f"2,2530 S 500 E,Salt Lake City,UT,84106,{deadline},44,",
+    ])
+    assert report.loaded == 1
+    assert report.rejected == [(3, f"invalid deadline '{deadline}'")]
+    assert packages.lookup("2") is None
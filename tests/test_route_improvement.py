@@ -0,0 +1,77 @@
+import math
+import random
+import time
+import pytest
+from clock import travel_seconds
+from route_improvement import DeadlineGuard, improve_route, move_segment, reverse_segment, route_mileage
+
+# Points on a circle, so visiting them in angular order is already the shortest tour
+def circle_city(count):
+    points = [(math.cos(2 * math.pi * i / count), math.sin(2 * math.pi * i / count)) for i in range(count)]
+    return [[math.dist(a, b) for b in points] for a in points]
+
+def test_shortens_a_crossing_route():
+    distances = circle_city(8)
+    route = ["1", "2", "5", "4", "3", "6", "7"]
+    locations = {package_id: int(package_id) for package_id in route}
+    improved = improve_route(route, locations, distances, 0)
+    assert sorted(improved) == sorted(route)
+    assert route_mileage(improved, locations, distances, 0) < route_mileage(route, locations, distances, 0)
+
+def test_time_budget_holds_within_a_pass():
+    # No move helps on this tour, so a single pass scans every candidate: far longer than the budget
+    distances = circle_city(800)
+    route = [str(location) for location in range(1, 800)]
+    locations = {package_id: int(package_id) for package_id in route}
+    start = time.perf_counter()
+    improved = improve_route(route, locations, distances, 0, time_budget=0.05)
+    assert time.perf_counter() - start < 0.5
+    assert improved == route
+
+# Whether any stop with a deadline arrives after it, walking the whole tour
+def any_late(tour, due, distances, depart_time, speed):
+    clock = depart_time
+    for position in range(1, len(tour)):
+        clock += travel_seconds(distances[tour[position - 1]][tour[position]], speed)
+        if due[position] is not None and clock > due[position]:
+            return True
+    return False
+
+# Every move on small tours, a sample on long ones (long enough for every level of the guard's slack table)
+@pytest.mark.parametrize("stops, trials", [(10, 40), (45, 3), (300, 1)])
+def test_guard_matches_full_walk(stops, trials):
+    rng = random.Random(3)
+    points = [(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(9)]
+    distances = [[math.dist(a, b) for b in points] for a in points]
+    for _ in range(trials):
+        # Repeated locations included, so two visits to one place are separate stops
+        tour = [0] + [rng.randrange(1, 9) for _ in range(stops)] + [0]
+        due = [None] + [rng.choice([None, rng.randrange(8 * 3600, 8 * 3600 + stops * 600)]) for _ in range(stops)] + [None]
+        guard = DeadlineGuard(tour, due, distances, 8 * 3600, 18)
+        exempt = guard.due  # Deadlines already missed on the starting tour are dropped
+        reversals = [(i, j) for i in range(1, len(tour) - 2) for j in range(i + 1, len(tour) - 1)]
+        moves = [(i, length, p) for length in range(1, 4) for i in range(1, len(tour) - length)
+                 for p in range(len(tour) - 1) if not i - 1 <= p < i + length]
+        for i, j in rng.sample(reversals, min(len(reversals), 500)):
+            moved, moved_due = tour[:], exempt[:]
+            reverse_segment(moved, i, j)
+            reverse_segment(moved_due, i, j)
+            assert guard.allows_reversal(i, j) == (not any_late(moved, moved_due, distances, 8 * 3600, 18))
+        for i, length, p in rng.sample(moves, min(len(moves), 1500)):
+            moved, moved_due = tour[:], exempt[:]
+            move_segment(moved, i, length, p)
+            move_segment(moved_due, i, length, p)
+            assert guard.allows_move(i, length, p) == (not any_late(moved, moved_due, distances, 8 * 3600, 18))
+
+def test_second_visit_to_a_late_location_is_protected():
+    # Location 1 is visited twice: the first visit is already late, the second is on time with no slack
+    points = [(0, 0), (10, 0), (0, 5), (0, 6)]
+    distances = [[math.dist(a, b) for b in points] for a in points]
+    tour = [0, 1, 2, 3, 1, 0]
+    clock = 8 * 3600
+    for a, b in zip(tour[:4], tour[1:5]):
+        clock += travel_seconds(distances[a][b], 18)
+    guard = DeadlineGuard(tour, [None, 8 * 3600, None, None, clock, None], distances, 8 * 3600, 18)
+    assert guard.due[1] is None and guard.due[4] == clock
+    # Moving location 3 to the front delays the second visit to location 1
+    assert not guard.allows_move(3, 1, 0)
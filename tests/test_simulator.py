@@ -0,0 +1,77 @@
+import io
+import pytest
+import instrumentation
+import main
+from clock import clock_seconds, parse_clock
+from conftest import PROGRAM_DIRECTORY
+from delivery_logic import get_address_index
+from routing_engine import STANDARD_ADDRESS_CHANGES
+from simulator import simulate_day
+
+OLD_ADDRESS = "300 State St, Salt Lake City, UT 84103"
+NEW_ADDRESS = STANDARD_ADDRESS_CHANGES[0][2]
+
+# Delivery times of the standard day from the per-truck delivery loop the simulator replaced
+LEGACY_TIMES = {
+    '1': "8:37:00", '2': "11:22:20", '3': "11:39:20", '4': "11:04:00", '5': "8:48:40", '6': "10:25:40",
+    '7': "12:01:40", '8': "9:13:20", '9': "11:44:00", '10': "9:22:40", '11': "10:12:20", '12': "9:45:20",
+    '13': "8:59:20", '14': "8:18:00", '15': "8:11:20", '16': "8:11:20", '17': "10:30:00", '18': "10:54:20",
+    '19': "9:40:40", '20': "8:28:00", '21': "8:28:00", '22': "12:26:20", '23': "10:56:20", '24': "10:26:00",
+    '25': "9:13:00", '26': "9:13:00", '27': "11:24:40", '28': "11:00:40", '29': "9:41:00", '30': "9:58:40",
+    '31': "10:20:40", '32': "11:09:40", '33': "11:22:20", '34': "9:24:20", '35': "11:24:40", '36': "10:41:00",
+    '37': "8:48:40", '38': "11:36:00", '39': "11:30:00", '40': "8:33:20"}
+LEGACY_MILEAGE = 135.5
+
+# The legacy loop drove truck 3's route in its loaded order; the simulator slots package 9 into its cheapest place
+# once the 10:20 correction is known, which brings 9 and the stop after it forward and saves two miles
+REROUTED_TIMES = {'7': "11:55:00", '9': "11:40:40"}
+REROUTE_SAVING = 2.0
+
+# Run the standard day with package 9's correction reaching the simulator at `when`; returns (package 9, its leg,
+# warnings). The routes are still planned around the standard 10:20 correction.
+@pytest.fixture
+def day_with_correction(monkeypatch):
+    monkeypatch.chdir(PROGRAM_DIRECTORY)
+    warnings = io.StringIO()
+    monkeypatch.setattr(instrumentation, "warning_stream", warnings)
+
+    def run(when, drivers):
+        monkeypatch.setattr(main, "DRIVERS", drivers)
+        changes = [(when, '9', NEW_ADDRESS)]
+        monkeypatch.setattr(main, "simulate_day", lambda *args, **options: simulate_day(
+            *args, **dict(options, address_changes=changes)))
+        package_hash, _, simulator = main.simulate_standard_day()
+        leg = next(leg for legs in simulator.legs.values() for leg in legs if '9' in leg[0])
+        return package_hash.lookup('9'), leg, warnings.getvalue()
+    return run
+
+def test_standard_day_matches_legacy_results(monkeypatch):
+    monkeypatch.chdir(PROGRAM_DIRECTORY)
+    monkeypatch.setattr(instrumentation, "warning_stream", io.StringIO())
+    package_hash, trucks, _ = main.simulate_standard_day()
+    expected = {package_id: parse_clock(text) for package_id, text in {**LEGACY_TIMES, **REROUTED_TIMES}.items()}
+    assert {package_id: package_hash.lookup(package_id).delivery_time for package_id in expected} == expected
+    assert sum(truck.mileage for truck in trucks) == pytest.approx(LEGACY_MILEAGE - REROUTE_SAVING)
+
+def test_correction_before_departure_reroutes(day_with_correction):
+    package, leg, warnings = day_with_correction(clock_seconds(10, 20), 2)
+    assert package.address == NEW_ADDRESS
+    assert leg[1] == get_address_index(NEW_ADDRESS) == package.location
+    assert "refused" not in warnings
+
+def test_correction_under_way_is_refused(day_with_correction):
+    _, leg, _ = day_with_correction(clock_seconds(10, 20), 2)
+    package, late_leg, warnings = day_with_correction(leg[2] + 60, 2)  # A minute into the drive to package 9
+    assert package.address == OLD_ADDRESS
+    assert late_leg[1] == get_address_index(OLD_ADDRESS) == package.location
+    assert "Address correction for package 9 refused" in warnings
+
+# With one driver, truck 3 is still waiting at the hub when its own drive to package 9 would have started,
+# so the same late correction is taken
+def test_correction_reroutes_while_truck_waits_for_driver(day_with_correction):
+    _, leg, _ = day_with_correction(clock_seconds(10, 20), 2)
+    package, waiting_leg, warnings = day_with_correction(leg[2] + 60, 1)
+    assert waiting_leg[2] > leg[2] + 60
+    assert package.address == NEW_ADDRESS
+    assert waiting_leg[1] == get_address_index(NEW_ADDRESS) == package.location
+    assert "refused" not in warnings
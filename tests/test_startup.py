@@ -0,0 +1,57 @@
+import io
+import os
+import subprocess
+import sys
+import time
+import pytest
+import instrumentation
+from conftest import PROGRAM_DIRECTORY
+from main import simulate_standard_day
+
+# Slowest acceptable cold lookup.py run from current precomputed results, interpreter start-up included.
+# A lookup answers in well under 0.1 s; importing the simulation stack on the fast path blows past this.
+LOOKUP_LIMIT_SECONDS = 0.5
+RUNS = 3  # The fastest of a few runs is the one least disturbed by the rest of the machine
+
+QUERIES = [("1", "08:30:00"), ("9", "10:30:00"), ("6", "09:30:00"), ("25", "12:00:00"), ("40", "17:00:00")]
+
+@pytest.fixture(scope="module")
+def standard_day():
+    stream = instrumentation.warning_stream
+    instrumentation.warning_stream = io.StringIO()
+    current = os.getcwd()
+    os.chdir(PROGRAM_DIRECTORY)
+    try:
+        package_hash, _, _ = simulate_standard_day()
+    finally:
+        os.chdir(current)
+        instrumentation.warning_stream = stream
+    return package_hash
+
+@pytest.fixture
+def results_file(tmp_path):
+    filename = str(tmp_path / "results.cache")
+    run_lookup(["1", "--at", "08:00:00", "--results", filename, "--rebuild"])
+    return filename
+
+# Run lookup.py in a fresh interpreter; returns (seconds, stdout)
+def run_lookup(arguments):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "lookup.py"] + arguments, capture_output=True, text=True,
+                            cwd=PROGRAM_DIRECTORY, check=True)
+    return time.perf_counter() - start, result.stdout
+
+@pytest.mark.parametrize("package_id, at", QUERIES)
+def test_lookup_matches_check_package_status(standard_day, results_file, package_id, at):
+    _, answer = run_lookup([package_id, "--at", at, "--results", results_file])
+    assert answer.strip() == standard_day.check_package_status(package_id, at)
+
+def test_cold_lookup_within_limit(results_file):
+    seconds = min(run_lookup(["9", "--at", "10:30:00", "--results", results_file])[0] for _ in range(RUNS))
+    assert seconds <= LOOKUP_LIMIT_SECONDS, f"lookup took {seconds:.3f} s, over the {LOOKUP_LIMIT_SECONDS} s limit"
+
+def test_unknown_package(results_file):
+    result = subprocess.run([sys.executable, "lookup.py", "999", "--at", "10:30:00", "--results", results_file],
+                            capture_output=True, text=True, cwd=PROGRAM_DIRECTORY)
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Package 999 not found"
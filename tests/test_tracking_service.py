@@ -0,0 +1,37 @@
+import io
+import os
+from types import SimpleNamespace
+import instrumentation
+from clock import clock_seconds
+from conftest import PROGRAM_DIRECTORY
+from tracking_service import load_service
+
+QUERY_TIMES = [clock_seconds(8), clock_seconds(9, 30), clock_seconds(10, 30), clock_seconds(12), clock_seconds(18)]
+
+def service_args(state, change=None):
+    csv = os.path.join(PROGRAM_DIRECTORY, "CSV")
+    return SimpleNamespace(
+        addresses=os.path.join(csv, "address.csv"), distances=os.path.join(csv, "distance.csv"),
+        packages=os.path.join(csv, "package.csv"), fleet=os.path.join(csv, "fleet.csv"), drivers=2,
+        change=change, improve=False, state=state)
+
+# Every package and truck response at every query time
+def responses(service):
+    answers = {}
+    for at in QUERY_TIMES:
+        for package_id in service.index.times:
+            answers[("package", package_id, at)] = service.package_status(package_id, at)
+        for truck_id in service.trucks:
+            answers[("truck", truck_id, at)] = service.truck_status(truck_id, at)
+    return answers
+
+def test_restored_service_answers_like_the_live_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "warning_stream", io.StringIO())
+    state = str(tmp_path / "state")
+    # A correction for a package without a "Wrong address" note, and none for package 9, so the day has flags
+    change = [["09:00:00", "2", "410 S State St, Salt Lake City, UT 84111"]]
+    live = load_service(service_args(state, change))
+    assert live.day.flags  # Package 9 has no correction
+    restored = load_service(service_args(state))  # Restarted without --change: everything comes from the state
+    assert restored.day.flags == live.day.flags
+    assert responses(restored) == responses(live)
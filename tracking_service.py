@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
+from batch import DayResult, load_shared_data, run_day
+from clock import END_OF_DAY, format_clock, parse_clock
+from event_log import RunStore, restore
+from routing_engine import STANDARD_ADDRESS_CHANGES, load_constraints
+from status_index import AT_HUB, DELIVERED, EN_ROUTE, StatusIndex
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+MAX_HEADER_LINES = 100
+
+# JSON status answers over one simulated day. A package's status only changes at its departure and delivery,
+# so responses are cached per (package, bucket) where the bucket is which of those times have passed; every
+# query time in the same bucket gets the same pre-encoded body.
+class TrackingService:
+    def __init__(self, day, cache_size=262144):
+        self.day = day
+        self.index = StatusIndex(day.packages)
+        self.trucks = {str(truck.id): truck for truck in day.trucks}
+        self.package_body = lru_cache(maxsize=cache_size)(self._package_body)
+        self.truck_body = lru_cache(maxsize=cache_size)(self._truck_body)
+
+    # (status, body) for GET /packages/{id}?at=
+    def package_status(self, package_id, at):
+        times = self.index.times.get(package_id)
+        if times is None:
+            return 404, json.dumps({"error": f"package {package_id} not found"}).encode()
+        departure, delivery = times
+        if delivery is not None and at >= delivery:
+            bucket = 2
+        elif departure is not None and at >= departure:
+            bucket = 1
+        else:
+            bucket = 0
+        return 200, self.package_body(package_id, bucket)
+
+    def _package_body(self, package_id, bucket):
+        package = self.day.packages.lookup(package_id)
+        deadline = self.day.constraints[package_id].deadline
+        delivered = bucket == 2
+        return json.dumps({
+            "package_id": package_id,
+            "status": (AT_HUB, EN_ROUTE, DELIVERED)[bucket],
+            "truck": package.truck,
+            "address": package.address,
+            "deadline": package.deadline,
+            "departure": format_clock(package.departure_time) if bucket else None,
+            "delivery": format_clock(package.delivery_time) if delivered else None,
+            "on_time": (deadline is None or package.delivery_time <= deadline) if delivered else None,
+            "flag": self.day.flags.get(package_id),
+        }).encode()
+
+    # (status, body) for GET /trucks/{id}?at=
+    def truck_status(self, truck_id, at):
+        truck = self.trucks.get(truck_id)
+        if truck is None:
+            return 404, json.dumps({"error": f"truck {truck_id} not found"}).encode()
+        index = self.index.trucks.get(truck.id)
+        positions = index.positions(at) if index is not None else (0, 0)
+        returned = bool(self.day.routes.get(truck.id)) and at >= truck.time
+        return 200, self.truck_body(truck_id, positions, returned)
+
+    def _truck_body(self, truck_id, positions, returned):
+        truck = self.trucks[truck_id]
+        index = self.index.trucks.get(truck.id)
+        departed, delivered = positions
+        total = index.total if index is not None else 0
+        return json.dumps({
+            "truck": truck.id,
+            "departure": format_clock(truck.depart_time),
+            "return": format_clock(truck.time) if self.day.routes.get(truck.id) else None,
+            "returned": returned,
+            "counts": {AT_HUB: total - departed, EN_ROUTE: departed - delivered, DELIVERED: delivered},
+            # Delivered packages in delivery order, up to this time
+            "delivered": index.delivery_order[:delivered] if index is not None else [],
+            "route": list(self.day.routes.get(truck.id, ())),
+            "mileage": round(truck.mileage, 2) if returned else None,
+        }).encode()
+
+    # Route one request target to a (status, body) pair
+    def respond(self, method, target):
+        if method != "GET":
+            return 405, json.dumps({"error": "only GET is supported"}).encode()
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            at_values = parse_qs(url.query).get("at")
+            at = parse_clock(at_values[0]) if at_values else END_OF_DAY  # Status at the end of the day by default
+        except ValueError as e:
+            return 400, json.dumps({"error": str(e)}).encode()
+
+        if len(parts) == 2 and parts[0] == "packages":
+            return self.package_status(parts[1], at)
+        if len(parts) == 2 and parts[0] == "trucks":
+            return self.truck_status(parts[1], at)
+        if parts == ["trucks"]:
+            bodies = [self.truck_status(truck_id, at)[1] for truck_id in self.trucks]
+            return 200, b"[" + b", ".join(bodies) + b"]"
+        return 404, json.dumps({"error": f"no route for {url.path}"}).encode()
+
+    # One client connection; keeps serving requests until the client closes or asks to
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                for _ in range(MAX_HEADER_LINES):
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    if header.lower().startswith(b"connection:") and b"close" in header.lower():
+                        keep_alive = False
+
+                fields = request_line.decode("latin-1").split()
+                if len(fields) != 3:
+                    status, body = 400, json.dumps({"error": "malformed request line"}).encode()
+                    keep_alive = False
+                else:
+                    status, body = self.respond(fields[0], fields[1])
+                    keep_alive = keep_alive and fields[2] == "HTTP/1.1"
+
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080, backlog=4096):
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+# Load the shared data and simulate the day once, then serve it. With a state directory, a restart picks the
+# day back up from its snapshot and event log instead of re-running it.
+def load_service(args):
+    state = args.state
+    restored = restore(state) if state else None
+    if restored is not None:
+        packages, trucks, routes, flags, address_changes = restored
+        constraints = load_constraints(packages, address_changes)
+        return TrackingService(DayResult(None, packages, trucks, constraints, routes, flags))
+
+    load_shared_data(args.addresses, args.distances)
+    # The standard day's corrections apply unless others are given
+    if args.change is None:
+        address_changes = STANDARD_ADDRESS_CHANGES
+    else:
+        address_changes = [(parse_clock(when), package_id, address) for when, package_id, address in args.change]
+    store = RunStore(state) if state else None
+    day = run_day(args.packages, args.fleet, args.drivers, address_changes, args.improve, store=store)
+    if store is not None:
+        store.close()
+    return TrackingService(day)
+
+async def serve(service, host, port):
+    server = await service.start(host, port)
+    print(f"Serving {len(service.index.times)} packages on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP package tracking for a simulated WGUPS day")
+    parser.add_argument("--addresses", default="CSV/address.csv")
+    parser.add_argument("--distances", default="CSV/distance.csv")
+    parser.add_argument("--packages", default="CSV/package.csv")
+    parser.add_argument("--fleet", default="CSV/fleet.csv")
+    parser.add_argument("--drivers", type=int, default=2)
+    parser.add_argument("--change", nargs=3, action="append", metavar=("HH:MM:SS", "PACKAGE", "ADDRESS"),
+                        help="address correction that becomes known at a time of day (default: package 9 at 10:20)")
+    parser.add_argument("--improve", action="store_true")
+    parser.add_argument("--state", help="directory for the event log and snapshots; restarts resume from it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    service = load_service(args)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
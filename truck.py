@@ -1,4 +1,8 @@
-from datetime import timedelta
+import csv
+import instrumentation
+from clock import format_am_pm, parse_am_pm, travel_seconds
+
+HUB_ADDRESS = "4001 South 700 East"  # The original depot, used when no other hub is given
 
 #Create truck class
 class Truck:
@@ -8,34 +12,59 @@ class Truck:
         self.speed = speed  # Speed in miles per hour (mph)
         self.mileage = mileage
         self.current_location = current_location 
-        self.packages = packages # List of packages on the truck
-        self.depart_time = depart_time # Time when truck leaves the hub
+        self.hub = current_location # Depot address the truck starts from and returns to
+        self.packages = packages # List of packages on the truck (also kept as a set for membership checks)
+        self.depart_time = depart_time # Time when truck leaves the hub, in seconds since midnight
         self.time = depart_time # Current time, intially set to departure time
+        self.greedy_mileage = None # Planned route miles before the improvement pass, if one ran
+        self.improved_mileage = None # Planned route miles after the improvement pass, if one ran
     
-    # Simulate delivering package by updating mileage and time based on distance traveled
-    def deliver(self, package_id, distance, destination):
-        # Check if the package is on the truck
-        if package_id in self.packages:
-            self.mileage += distance
-            time_taken = timedelta(hours=distance / self.speed)
-            self.time += time_taken
-            self.current_location = destination
-            return self.time
-        else:
-            print(f"Warning: Package {package_id} not found on Truck {self.id}.")
-            return None
+    @property
+    def packages(self):
+        return self._packages
+
+    @packages.setter
+    def packages(self, packages):
+        self._packages = packages
+        self._loaded = set(packages)
+
+    def has_package(self, package_id):
+        return package_id in self._loaded
 
+    # Simulate one stop that delivers several packages: a single drive, however many packages are dropped there
+    def deliver_stop(self, package_ids, distance, destination):
+        missing = [package_id for package_id in package_ids if package_id not in self._loaded]
+        for package_id in missing:
+            instrumentation.warn(f"Package {package_id} not found on Truck {self.id}.")
+        if len(missing) == len(package_ids):
+            return None
+        self.mileage += distance
+        self.time += travel_seconds(distance, self.speed)
+        self.current_location = destination
+        return self.time
 
     # Simulate returning to hub by updating mileage and time based on distance traveled
     def return_to_hub(self, distance):
         self.mileage += distance
-        self.time += timedelta(hours=distance / self.speed)
-        self.current_location = "4001 South 700 East"   # Hub address
+        self.time += travel_seconds(distance, self.speed)
+        self.current_location = self.hub
         return self.time
      
     
     # Provide a string representation of the truck's current state
     def __str__(self):
-        return f"Truck {self.id}: Capacity={self.capacity}, Speed={self.speed}, Packages={len(self.packages)}, Location={self.current_location}, Time={self.time.strftime('%I:%M %p')}"
+        return f"Truck {self.id}: Capacity={self.capacity}, Speed={self.speed}, Packages={len(self.packages)}, Location={self.current_location}, Time={format_am_pm(self.time)}"
 
-    
\ No newline at end of file
+# Load trucks from a fleet CSV (Truck ID, Capacity, Speed, Departure such as "8:00 AM", optionally Hub); every
+# truck starts empty at its hub, which is the given hub address unless the row names one
+def load_fleet(filename, hub=HUB_ADDRESS):
+    trucks = []
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Skip header row
+        for row in reader:
+            if not row:
+                continue
+            truck_hub = row[4].strip() if len(row) > 4 and row[4].strip() else hub
+            trucks.append(Truck(int(row[0]), int(row[1]), float(row[2]), 0, truck_hub, [], parse_am_pm(row[3])))
+    return trucks
@@ -0,0 +1,178 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from clock import SECONDS_PER_HOUR
+from delivery_logic import get_address_index
+from routing_engine import load_constraints
+
+# Packages that must ride together (a co-delivery group, or a single package) and their combined constraints
+class LoadUnit:
+    __slots__ = ("package_ids", "location", "truck", "available_at", "deadline")
+
+    def __init__(self, package_ids, location, truck, available_at, deadline):
+        self.package_ids = package_ids
+        self.location = location  # Representative stop used for clustering
+        self.truck = truck  # Required truck ID, if any member is restricted
+        self.available_at = available_at  # Latest availability among the members
+        self.deadline = deadline  # Earliest deadline among the members, None for EOD
+
+# Build load units from the package table, flagging groups whose members contradict each other
+def build_units(packages, constraints, infeasible):
+    units = []
+    seen = set()
+    for package in packages:
+        package_id = package.package_id
+        if package_id in seen:
+            continue
+        group = constraints[package_id].delivered_with or (package_id,)
+        members = [member for member in group if packages.lookup(member) is not None]
+        seen.update(members)
+
+        required = {constraints[member].truck for member in members if constraints[member].truck is not None}
+        if len(required) > 1:
+            for member in members:
+                infeasible[member] = f"co-delivery group is restricted to different trucks {sorted(required)}"
+            continue
+        unresolved = [member for member in members if packages.lookup(member).location is None]
+        if unresolved:
+            for member in members:
+                infeasible[member] = f"address of package {unresolved[0]} could not be resolved"
+            continue
+        uncorrected = [member for member in members if constraints[member].wrong_address]
+        if uncorrected:
+            for member in members:
+                infeasible[member] = f"package {uncorrected[0]} is listed with a wrong address and no correction"
+            continue
+
+        deadlines = [constraints[member].deadline for member in members if constraints[member].deadline is not None]
+        units.append(LoadUnit(
+            members,
+            packages.lookup(members[0]).location,
+            required.pop() if required else None,
+            max(constraints[member].available_at for member in members),
+            min(deadlines) if deadlines else None,
+        ))
+    return units
+
+# Pick one seed location per truck by farthest-point sampling, starting from the stop farthest from the hub
+def choose_seeds(units, distances, hub_index, count):
+    locations = list(dict.fromkeys(unit.location for unit in units))
+    if not locations:
+        return [hub_index] * count
+    nearest_seed = array('d', (distances[hub_index][location] for location in locations))
+    seeds = []
+    for _ in range(count):
+        best = max(range(len(locations)), key=nearest_seed.__getitem__)
+        seed = locations[best]
+        seeds.append(seed)
+        row = distances[seed]
+        for i, location in enumerate(locations):
+            if row[location] < nearest_seed[i]:
+                nearest_seed[i] = row[location]
+    return seeds
+
+_seed_rows = None  # Seed rows of the distance matrix, installed once per clustering worker
+
+def _install_seed_rows(seed_rows):
+    global _seed_rows
+    _seed_rows = seed_rows
+
+# For each location, the truck indices ordered by distance from their seeds (closest first)
+def rank_trucks(locations):
+    rows = _seed_rows
+    order = range(len(rows))
+    return [sorted(order, key=lambda truck_index: rows[truck_index][location]) for location in locations]
+
+# Rank trucks for every distinct unit location, splitting the work across processes when workers > 1
+def rank_locations(units, distances, seeds, workers=1, chunk_size=500):
+    seed_rows = [array('d', distances[seed]) for seed in seeds]
+    locations = list(dict.fromkeys(unit.location for unit in units))
+    if workers <= 1 or len(locations) <= chunk_size:
+        _install_seed_rows(seed_rows)
+        return dict(zip(locations, rank_trucks(locations)))
+
+    chunks = [locations[i:i + chunk_size] for i in range(0, len(locations), chunk_size)]
+    rankings = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_install_seed_rows, initargs=(seed_rows,)) as pool:
+        for ranking in pool.map(rank_trucks, chunks):
+            rankings.extend(ranking)
+    return dict(zip(locations, rankings))
+
+# Number of trucks whose departure time alone would let them carry a unit; used to load the most constrained units first
+def count_eligible(unit, departures, distances, hub_index, speed):
+    if unit.truck is not None:
+        return 1
+    low = bisect_left(departures, unit.available_at)
+    if unit.deadline is None:
+        return len(departures) - low
+    latest = unit.deadline - distances[hub_index][unit.location] * SECONDS_PER_HOUR / speed
+    return max(0, bisect_right(departures, latest) - low)
+
+# Whether a truck can carry a unit: right truck, leaves after the packages arrive, and can reach them in time
+def can_carry(truck, unit, distances, hub_index):
+    if unit.truck is not None and unit.truck != truck.id:
+        return False
+    if unit.available_at > truck.depart_time:
+        return False
+    if unit.deadline is not None:
+        direct = distances[hub_index][unit.location] * SECONDS_PER_HOUR / truck.speed
+        if truck.depart_time + direct > unit.deadline:
+            return False
+    return True
+
+# Partition every package in the table across the trucks, replacing their package lists. Units are
+# clustered around one seed stop per truck, seeded from that truck's hub, most constrained units first,
+# without exceeding capacity.
+# Returns {package ID: reason} for packages no truck could take.
+def assign_packages(trucks, packages, distances, constraints=None, workers=1):
+    if constraints is None:
+        constraints = load_constraints(packages)
+    hubs = [get_address_index(truck.hub) for truck in trucks]
+    groups = {}  # hub index -> indices of the trucks based there
+    for truck_index, hub_index in enumerate(hubs):
+        groups.setdefault(hub_index, []).append(truck_index)
+    infeasible = {}
+
+    units = build_units(packages, constraints, infeasible)
+
+    # Each hub seeds its trucks' clusters among the units closer to it than to any other hub
+    nearest_hub = {}
+    for unit in units:
+        if groups and unit.location not in nearest_hub:
+            nearest_hub[unit.location] = min(groups, key=lambda hub_index: distances[hub_index][unit.location])
+    seeds = [None] * len(trucks)
+    for hub_index, members in groups.items():
+        hub_units = [unit for unit in units if nearest_hub[unit.location] == hub_index]
+        for truck_index, seed in zip(members, choose_seeds(hub_units, distances, hub_index, len(members))):
+            seeds[truck_index] = seed
+    rankings = rank_locations(units, distances, seeds, workers)
+
+    # Most constrained first: fixed truck, then fewest eligible trucks across every hub, then earliest deadline
+    fleets = [(hub_index, sorted(trucks[i].depart_time for i in members), min(trucks[i].speed for i in members))
+              for hub_index, members in groups.items()]
+    order = sorted(units, key=lambda unit: (
+        unit.truck is None,
+        sum(count_eligible(unit, departures, distances, hub_index, slowest) for hub_index, departures, slowest in fleets),
+        unit.deadline if unit.deadline is not None else float('inf'),
+    ))
+
+    loads = [[] for _ in trucks]
+    for unit in order:
+        size = len(unit.package_ids)
+        eligible = False
+        for truck_index in rankings[unit.location]:
+            truck = trucks[truck_index]
+            if not can_carry(truck, unit, distances, hubs[truck_index]):
+                continue
+            eligible = True
+            if len(loads[truck_index]) + size <= truck.capacity:
+                loads[truck_index].extend(unit.package_ids)
+                break
+        else:
+            reason = "no eligible truck has room" if eligible else "no truck satisfies its constraints"
+            for package_id in unit.package_ids:
+                infeasible[package_id] = reason
+
+    for truck, load in zip(trucks, loads):
+        truck.packages = load
+    return infeasible